@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+
+import pytest
+
+
+@pytest.fixture
+def query_budget():
+    """Контекстный менеджер, проверяющий бюджет запросов к базе.
+
+    with query_budget(max_queries=5, max_repeats=1):
+        client.get('/')
+    """
+    from core.queries import QueryWatcher, execute_wrapper
+
+    @contextmanager
+    def check(max_queries=None, max_repeats=1, max_ms=None):
+        watcher = QueryWatcher()
+        with execute_wrapper(watcher):
+            yield watcher
+        problems = watcher.violations(
+            max_repeats=max_repeats, max_queries=max_queries, max_ms=max_ms
+        )
+        assert not problems, (
+            'Превышен бюджет запросов к базе:\n' + '\n'.join(problems)
+        )
+
+    return check
@@ -0,0 +1,36 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+# Бюджет запросов для авторизованного пользователя (кэш страниц не работает):
+# сессия, пользователь, посты страницы и объекты самой страницы.
+URL_BUDGETS = {
+    'index': ('/', 4),
+    'group': ('/group/{post.group.slug}/', 5),
+    'profile': ('/profile/{post.author.username}/', 5),
+    'post_detail': ('/posts/{post.id}/', 4),
+    'search': ('/search/?q=Тестовый', 4),
+}
+
+
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('name', URL_BUDGETS)
+    def test_url_query_budget(self, name, user_client, query_budget,
+                              few_posts_with_group):
+        url, max_queries = URL_BUDGETS[name]
+        url = url.format(post=few_posts_with_group)
+        with query_budget(max_queries=max_queries, max_repeats=1):
+            response = user_client.get(url)
+        assert response.status_code == 200, (
+            f'Страница `{url}` должна открываться'
+        )
+
+    def test_query_budget_catches_repeats(self, query_budget,
+                                          few_posts_with_group):
+        from posts.models import Post
+
+        with pytest.raises(AssertionError, match='раз:'):
+            with query_budget(max_repeats=1):
+                for post in Post.objects.all()[:3]:
+                    post.author.username
@@ -0,0 +1,205 @@
+import base64
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import run_on_commit
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(API_PAGE_SIZE=10)
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.other = User.objects.create_user(username='Other_user')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        for i in range(25):
+            Post.objects.create(
+                text=f'Текст № {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None,
+            )
+        cls.post = Post.objects.create(text='Чужой пост', author=cls.other)
+        cls.posts_url = reverse('api:posts')
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.client = Client()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response
+
+    def collect(self, url, **params):
+        """Все посты ленты по ссылкам next."""
+        data = self.get(url, **params).json()
+        results = data['results']
+        while data['next']:
+            data = self.get(data['next']).json()
+            results += data['results']
+        return results
+
+    def test_posts_cursor_paging(self):
+        """Ссылки next обходят ленту без пропусков и повторов."""
+        ids = [post['id'] for post in self.collect(self.posts_url)]
+        self.assertEqual(ids, list(Post.objects.values_list('pk', flat=True)))
+
+    def test_sparse_fields(self):
+        """?fields= отдаёт и выбирает из базы только запрошенные поля."""
+        caches['feeds'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(self.posts_url, fields='id,author').json()
+        self.assertEqual(
+            data['results'][0], {'id': self.post.pk, 'author': 'Other_user'}
+        )
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('"posts_post"."text"', sql)
+        self.assertNotIn('posts_group', sql)
+
+    def test_post_fields(self):
+        data = self.get(self.posts_url, limit=1).json()
+        self.assertEqual(set(data['results'][0]), {
+            'id', 'text', 'pub_date', 'updated', 'author', 'group', 'image'
+        })
+
+    def test_bad_requests(self):
+        """Неверные параметры — 400 с описанием ошибки."""
+        overflow = base64.urlsafe_b64encode(
+            b'2020-01-01T00:00:00+00:00|99999999999999999999999'
+        ).decode()
+        for params in ({'fields': 'id,password'}, {'limit': 0},
+                       {'limit': 'many'}, {'after': 'broken'},
+                       {'after': overflow}):
+            with self.subTest(params=params):
+                response = self.client.get(self.posts_url, params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+                self.assertIn('detail', response.json())
+
+    def test_read_only(self):
+        response = self.client.post(self.posts_url)
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def test_group_and_author_feeds(self):
+        group_posts = self.collect(
+            reverse('api:group_posts', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(len(group_posts), 12)
+        self.assertTrue(
+            all(post['group'] == self.group.slug for post in group_posts)
+        )
+        author_posts = self.collect(
+            reverse('api:author_posts', kwargs={'username': 'Other_user'})
+        )
+        self.assertEqual([post['id'] for post in author_posts],
+                         [self.post.pk])
+        for url in (
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            reverse('api:author_posts', kwargs={'username': 'missing'}),
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_etag(self):
+        """ETag ленты: 304 без запросов к базе, новый пост его меняет."""
+        etag = self.get(self.posts_url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.posts_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.user)
+        response = self.client.get(self.posts_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый пост')
+
+    def test_post_detail(self):
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.get(url, fields='text')
+        self.assertEqual(response.json(), {'text': 'Чужой пост'})
+        response = self.client.get(
+            url, {'fields': 'text'}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_author_rename_changes_etag(self):
+        """Смена имени автора меняет ETag его постов."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.get(url)['ETag']
+        author = User.objects.get(pk=self.other.pk)
+        author.username = 'Renamed_user'
+        with run_on_commit():
+            author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['author'], 'Renamed_user')
+
+    def test_groups(self):
+        response = self.get(reverse('api:groups'), fields='slug,posts_count')
+        self.assertEqual(
+            response.json(),
+            {'results': [{'slug': 'test-slug', 'posts_count': 12}],
+             'next': None}
+        )
+        response = self.client.get(
+            reverse('api:groups'),
+            {'fields': 'slug,posts_count'},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_groups_paging(self):
+        """Группы отдаются страницами по адресу, ссылки next их обходят."""
+        Group.objects.bulk_create(
+            Group(title=f'Группа {i}', slug=f'group-{i:02}', description='')
+            for i in range(12)
+        )
+        caches['feeds'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(reverse('api:groups'), limit=5).json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIn('LIMIT 6', queries[-1]['sql'])
+        groups = self.collect(reverse('api:groups'), limit=5, fields='slug')
+        self.assertEqual(
+            [group['slug'] for group in groups],
+            list(Group.objects.order_by('slug').values_list(
+                'slug', flat=True
+            ))
+        )
+
+    def test_groups_etag_follows_changes(self):
+        """ETag списка групп меняется с группами и числом их постов."""
+        url = reverse('api:groups')
+        etag = self.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        with run_on_commit():
+            Post.objects.create(
+                text='Новый пост', author=self.user, group=self.group
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['results'][0]['posts_count'], 13)
+        etag = response['ETag']
+        with run_on_commit():
+            Group.objects.create(title='Новая', slug='new', description='')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.json()['results']), 2)
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('groups/', views.groups, name='groups'),
+    path(
+        'groups/<slug:slug>/posts/', views.group_posts, name='group_posts'
+    ),
+    path(
+        'authors/<str:username>/posts/',
+        views.author_posts,
+        name='author_posts'
+    ),
+]
@@ -0,0 +1,257 @@
+import json
+from calendar import timegm
+from functools import partial, wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+
+from core.routers import primary_reads
+from posts.cache import (GROUP_LIST, INDEX_FEED, author_feed,
+                         get_cached_page, get_feed_version, group_feed,
+                         page_key, set_cached_page)
+from posts.conditional import make_etag, not_modified, set_validators
+from posts.models import Group, Post, User
+from posts.paginators import decode_cursor, encode_cursor, filter_after
+
+# Имя поля в ответе → поле для values(); связи — одним JOIN.
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+
+GROUP_FIELDS = {
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'posts_count': 'posts_count',
+}
+
+image_storage = Post._meta.get_field('image').storage
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def to_json(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+
+
+def json_response(content, status=HTTPStatus.OK):
+    return HttpResponse(
+        content, content_type='application/json', status=status
+    )
+
+
+def api_view(view):
+    """Только GET и HEAD; ошибки запроса отдаются JSON {"detail": ...}."""
+    @wraps(view)
+    @require_safe
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return json_response(
+                to_json({'detail': error.detail}), status=error.status
+            )
+    return wrapper
+
+
+def selected_fields(request, available):
+    """Поля из ?fields=a,b; без параметра — все."""
+    value = request.GET.get('fields')
+    if value is None:
+        return list(available)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST,
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(available)}.'
+        )
+    return list(dict.fromkeys(names))
+
+
+def page_size(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= settings.API_MAX_PAGE_SIZE:
+        raise ApiError(
+            HTTPStatus.BAD_REQUEST,
+            f'limit — число от 1 до {settings.API_MAX_PAGE_SIZE}.'
+        )
+    return limit
+
+
+def serialize_post(row, fields):
+    data = {name: row[POST_FIELDS[name]] for name in fields}
+    if data.get('image'):
+        data['image'] = image_storage.url(data['image'])
+    elif 'image' in data:
+        data['image'] = None
+    return data
+
+
+def next_link(request, cursor):
+    query = request.GET.copy()
+    query['after'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def feed_page(request, posts):
+    """Страница ленты после курсора ?after= и ссылка на следующую."""
+    fields = selected_fields(request, POST_FIELDS)
+    limit = page_size(request)
+    after = request.GET.get('after')
+    if after:
+        cursor = decode_cursor(after)
+        if cursor is None:
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Неверный курсор.')
+        posts = filter_after(posts, cursor)
+    # id и дата нужны для курсора, даже если их нет в ?fields=.
+    columns = {POST_FIELDS[name] for name in fields} | {'id', 'pub_date'}
+    rows = list(
+        posts.order_by('-pub_date', '-id').values(*columns)[:limit + 1]
+    )
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_url = next_link(
+            request, encode_cursor(rows[-1]['pub_date'], rows[-1]['id'])
+        )
+    return {
+        'results': [serialize_post(row, fields) for row in rows],
+        'next': next_url,
+    }
+
+
+def groups_page(request):
+    """Страница групп по адресу после ?after=<slug>."""
+    fields = selected_fields(request, GROUP_FIELDS)
+    limit = page_size(request)
+    groups = Group.objects.order_by('slug')
+    after = request.GET.get('after')
+    if after:
+        groups = groups.filter(slug__gt=after)
+    columns = {GROUP_FIELDS[name] for name in fields} | {'slug'}
+    rows = list(groups.values(*columns)[:limit + 1])
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_url = next_link(request, rows[-1]['slug'])
+    return {
+        'results': [
+            {name: row[GROUP_FIELDS[name]] for name in fields}
+            for row in rows
+        ],
+        'next': next_url,
+    }
+
+
+def feed_response(request, feed, build_page):
+    """Ответ ленты с ETag по версии ленты и кэшем готового JSON.
+
+    build_page(request) вызывается только при промахе кэша. Данные не
+    зависят от пользователя, поэтому кэш общий для всех.
+    """
+    version = get_feed_version(feed)
+    validators = {
+        'etag': make_etag('api', feed, version, request.get_full_path()),
+        'last_modified': int(float(version)),
+    }
+    response = not_modified(request, **validators)
+    if response is not None:
+        return response
+    key = page_key(feed, version, request.get_full_path())
+    content = get_cached_page(key)
+    if content is None:
+        content = to_json(build_page(request))
+        set_cached_page(key, content)
+    return set_validators(json_response(content), **validators)
+
+
+@api_view
+@primary_reads()
+def posts(request):
+    return feed_response(
+        request, INDEX_FEED, partial(feed_page, posts=Post.objects.all())
+    )
+
+
+@api_view
+@primary_reads()
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, 'Группа не найдена.')
+    return feed_response(
+        request,
+        group_feed(group_id),
+        partial(feed_page, posts=Post.objects.filter(group_id=group_id))
+    )
+
+
+@api_view
+@primary_reads()
+def author_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    if author_id is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, 'Автор не найден.')
+    return feed_response(
+        request,
+        author_feed(author_id),
+        partial(feed_page, posts=Post.objects.filter(author_id=author_id))
+    )
+
+
+@api_view
+@primary_reads()
+def post_detail(request, post_id):
+    fields = selected_fields(request, POST_FIELDS)
+    columns = {POST_FIELDS[name] for name in fields}
+    columns |= {'updated', 'author_id'}
+    row = Post.objects.filter(pk=post_id).values(*columns).first()
+    if row is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, 'Пост не найден.')
+    # Версия ленты автора меняется и при правке группы поста.
+    version = get_feed_version(author_feed(row['author_id']))
+    validators = {
+        'etag': make_etag('api', post_id, row['updated'].timestamp(),
+                          version, request.get_full_path()),
+        'last_modified': max(
+            timegm(row['updated'].utctimetuple()), int(float(version))
+        ),
+    }
+    response = not_modified(request, **validators)
+    if response is not None:
+        return response
+    return set_validators(
+        json_response(to_json(serialize_post(row, fields))), **validators
+    )
+
+
+@api_view
+@primary_reads()
+def groups(request):
+    return feed_response(request, GROUP_LIST, groups_page)
@@ -0,0 +1,221 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.client import responses
+from urllib.parse import unquote
+
+from django.conf import settings
+
+
+def build_environ(scope, body):
+    """WSGI environ по scope HTTP-запроса ASGI."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт путь байтами в latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI-приложение поверх WSGI-приложения Django.
+
+    Django 2.2 не умеет ни ASGI, ни асинхронные view, поэтому цикл событий
+    только принимает запросы и отдаёт ответы, а сам view выполняется
+    в пуле из max_workers потоков. Размер пула ограничивает и число
+    одновременных соединений с базой: у каждого потока оно своё.
+    """
+
+    def __init__(self, wsgi_application, max_workers):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(
+                f'Тип соединения не поддерживается: {scope["type"]}'
+            )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        # Большие тела запросов (картинки) уходят на диск, а не в память.
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self.executor,
+                self.run_wsgi, loop, build_environ(scope, body), send
+            )
+        finally:
+            body.close()
+
+    def run_wsgi(self, loop, environ, send):
+        """Выполняет запрос в потоке пула целиком.
+
+        Соединения Django с базой привязаны к потоку, поэтому и view,
+        и закрытие ответа (сигнал request_finished) идут в одном потоке.
+        Части ответа передаются в цикл событий по мере готовности, так что
+        потоковые ответы не собираются в памяти.
+        """
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        response = self.wsgi_application(environ, start_response)
+        try:
+            send_sync({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': started['headers'],
+            })
+            for chunk in response:
+                if chunk:
+                    send_sync({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            send_sync({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+
+
+async def handle_connection(application, reader, writer):
+    """Один запрос HTTP/1.1 на соединение, без keep-alive."""
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            return
+        method, target, version = request_line.decode('latin-1').split()
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((
+                name.strip().lower().encode('latin-1'),
+                value.strip().encode('latin-1'),
+            ))
+        length = int(dict(headers).get(b'content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': version.split('/', 1)[1],
+            'method': method,
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': writer.get_extra_info('peername')[:2],
+            'server': writer.get_extra_info('sockname')[:2],
+        }
+        messages = [{'type': 'http.request', 'body': body}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                lines = [f'HTTP/1.1 {status} {responses.get(status, "")}']
+                lines += [
+                    f'{name.decode("latin-1")}: {value.decode("latin-1")}'
+                    for name, value in message['headers']
+                ]
+                lines.append('Connection: close')
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode(
+                    'latin-1'
+                ))
+            else:
+                writer.write(message.get('body', b''))
+            await writer.drain()
+
+        await application(scope, receive, send)
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(application, host, port, started=None):
+    """Простой ASGI-сервер на asyncio для локального запуска и бенчмарков.
+
+    В боевом окружении yatube.asgi:application запускается uvicorn или
+    daphne. started вызывается с номером порта, когда сервер слушает.
+    """
+    server = await asyncio.start_server(
+        partial(handle_connection, application), host, port, backlog=1024
+    )
+    if started is not None:
+        started(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
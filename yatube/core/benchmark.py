@@ -0,0 +1,79 @@
+import math
+import time
+import tracemalloc
+
+from .queries import QueryWatcher, execute_wrapper
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(func, repeat, warmup=0, memory_repeat=10):
+    """Вызывает func repeat раз и собирает время, запросы и память.
+
+    Первые warmup вызовов не учитываются: они прогревают кэши шаблонов
+    и соединение с базой. Память меряется отдельным коротким прогоном,
+    потому что tracemalloc заметно замедляет код и исказил бы время.
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        watcher = QueryWatcher()
+        with execute_wrapper(watcher):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        queries.append(watcher.total)
+    tracemalloc.start()
+    try:
+        for _ in range(min(repeat, memory_repeat)):
+            func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(timings, queries, peak)
+
+
+def summarize(timings, queries, peak_memory):
+    """Сводка замеров: миллисекунды, запросы к базе и пик памяти в КиБ."""
+    milliseconds = [timing * 1000 for timing in timings]
+    return {
+        'requests': len(timings),
+        'p50_ms': round(percentile(milliseconds, 50), 2),
+        'p95_ms': round(percentile(milliseconds, 95), 2),
+        'p99_ms': round(percentile(milliseconds, 99), 2),
+        'max_ms': round(max(milliseconds), 2),
+        'queries': max(queries),
+        'peak_kib': round(peak_memory / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Сценарии, у которых p95 или число запросов выросли сильнее порога.
+
+    threshold задаётся в процентах; возвращает список строк-описаний.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        limit = previous['p95_ms'] * (1 + threshold / 100)
+        if result['p95_ms'] > limit:
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]} → {result["p95_ms"]} мс'
+            )
+        if result['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов {previous["queries"]} → '
+                f'{result["queries"]}'
+            )
+    return regressions
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+SLOW_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.file',
+)
+
+CACHED_SESSION_ENGINES = (
+    'core.sessions',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def uses_cached_templates():
+    for template in settings.TEMPLATES:
+        loaders = template.get('OPTIONS', {}).get('loaders', [])
+        for loader in loaders:
+            name = loader[0] if isinstance(loader, (list, tuple)) else loader
+            if name == 'django.template.loaders.cached.Loader':
+                return True
+    return False
+
+
+def is_process_local(alias):
+    return settings.CACHES[alias]['BACKEND'].endswith('LocMemCache')
+
+
+def check_feed_cache():
+    if not is_process_local(settings.FEED_CACHE_ALIAS):
+        return []
+    return [Warning(
+        'Версии лент в памяти процесса: воркер, не видевший новый пост, '
+        'отвечает 304 по старому ETag.',
+        hint='Задайте FEED_CACHE_DIR или общий кэш.',
+        id='core.W010',
+    )]
+
+
+def check_sessions():
+    warnings = []
+    if settings.SESSION_ENGINE in SLOW_SESSION_ENGINES:
+        warnings.append(Warning(
+            'Сессия читается из базы или с диска на каждый запрос.',
+            hint='Используйте core.sessions.',
+            id='core.W004',
+        ))
+    if (settings.SESSION_ENGINE in CACHED_SESSION_ENGINES
+            and is_process_local(settings.SESSION_CACHE_ALIAS)):
+        warnings.append(Warning(
+            'Кэш сессий в памяти процесса: другие воркеры не увидят '
+            'выход из аккаунта.',
+            hint='Задайте SESSION_CACHE_DIR или общий кэш.',
+            id='core.W009',
+        ))
+    return warnings
+
+
+@register('performance', deploy=True)
+def check_performance_settings(app_configs, **kwargs):
+    """Настройки, которые замедляют боевой сервер.
+
+    Запуск: python manage.py check --deploy --tag performance
+    """
+    warnings = []
+    if settings.DEBUG:
+        warnings.append(Warning(
+            'DEBUG включён: Django хранит все SQL-запросы в памяти.',
+            hint='Используйте YATUBE_ENV=prod.',
+            id='core.W001',
+        ))
+    if not uses_cached_templates():
+        warnings.append(Warning(
+            'Шаблоны разбираются заново при каждом запросе.',
+            hint='Включите django.template.loaders.cached.Loader.',
+            id='core.W002',
+        ))
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            warnings.append(Warning(
+                f'База {alias} открывает соединение на каждый запрос.',
+                hint='Задайте CONN_MAX_AGE.',
+                id='core.W003',
+            ))
+    warnings.extend(check_sessions())
+    warnings.extend(check_feed_cache())
+    for middleware, message, check_id in (
+        ('django.middleware.gzip.GZipMiddleware',
+         'Ответы уходят без сжатия.', 'core.W005'),
+        ('django.middleware.http.ConditionalGetMiddleware',
+         'Нет ответов 304 Not Modified.', 'core.W006'),
+    ):
+        if middleware not in settings.MIDDLEWARE:
+            warnings.append(Warning(
+                message, hint=f'Добавьте {middleware}.', id=check_id,
+            ))
+    if settings.SERVE_MEDIA:
+        warnings.append(Warning(
+            'Медиафайлы отдаёт Python-процесс.',
+            hint='Отдавайте MEDIA_ROOT веб-сервером, SERVE_MEDIA = False.',
+            id='core.W007',
+        ))
+    if settings.QUERY_BUDGET_MODE or settings.PERF_SAMPLE_RATE > 0.1:
+        warnings.append(Warning(
+            'Включена отладочная проверка или частые замеры запросов.',
+            hint='Оставьте QUERY_BUDGET_MODE пустым, '
+                 'PERF_SAMPLE_RATE не больше 0.1.',
+            id='core.W008',
+        ))
+    return warnings
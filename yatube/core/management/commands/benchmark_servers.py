@@ -0,0 +1,160 @@
+import asyncio
+import http.client
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+from django.urls import reverse
+
+from core.asgi import WsgiToAsgi, serve
+from core.benchmark import percentile
+from posts.models import Group, Post
+
+SERVERS = ('wsgi', 'asgi')
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_server(kind, threads, pipe):
+    """Запускает сервер в дочернем процессе и сообщает родителю порт."""
+    for connection in connections.all():
+        connection.close()
+    if kind == 'wsgi':
+        # Как runserver и многопоточные WSGI-серверы: поток на соединение.
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+        server.set_app(WSGIHandler())
+        pipe.send(server.server_address[1])
+        server.serve_forever()
+    else:
+        application = WsgiToAsgi(WSGIHandler(), threads)
+        asyncio.run(serve(application, '127.0.0.1', 0, started=pipe.send))
+
+
+def fetch(port, url):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', url)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def load(port, urls, concurrency, duration):
+    """concurrency клиентов по кругу запрашивают urls в течение duration."""
+    deadline = time.monotonic() + duration
+
+    def client(number):
+        latencies, errors = [], 0
+        position = number
+        while time.monotonic() < deadline:
+            url = urls[position % len(urls)]
+            position += 1
+            started = time.perf_counter()
+            try:
+                status = fetch(port, url)
+            except OSError:
+                errors += 1
+                continue
+            if status >= 400:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies, errors
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+    latencies = [value for values, _ in results for value in values]
+    errors = sum(errors for _, errors in results)
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI (поток на соединение) и yatube.asgi (цикл событий '
+        'и пул потоков) под параллельной нагрузкой на ленты и страницу '
+        'поста: запросы в секунду и задержки p50/p95/p99.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Число одновременных клиентов.'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность нагрузки на каждый сервер в секундах.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASGI_THREADS,
+            help='Размер пула потоков ASGI.'
+        )
+        parser.add_argument(
+            '--server', action='append', choices=SERVERS,
+            help='Сервер для замера; по умолчанию оба.'
+        )
+
+    def get_urls(self):
+        post = Post.objects.exclude(author=None).select_related(
+            'author'
+        ).first()
+        group = Group.objects.first()
+        if post is None or group is None:
+            raise CommandError(
+                'Нет постов или групп: сначала выполните seed_database.'
+            )
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': post.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        ]
+
+    def handle(self, *args, **options):
+        urls = self.get_urls()
+        # Дочерние процессы не должны унаследовать открытые соединения.
+        for connection in connections.all():
+            connection.close()
+        context = multiprocessing.get_context('fork')
+        for kind in options['server'] or SERVERS:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=run_server,
+                args=(kind, options['threads'], sender),
+                daemon=True,
+            )
+            process.start()
+            try:
+                port = receiver.recv()
+                latencies, errors = load(
+                    port, urls, options['concurrency'], options['duration']
+                )
+            finally:
+                process.terminate()
+                process.join()
+            self.report(kind, latencies, errors, options['duration'])
+
+    def report(self, kind, latencies, errors, duration):
+        if not latencies:
+            self.stdout.write(f'{kind}: нет успешных запросов, '
+                              f'ошибок {errors}.')
+            return
+        self.stdout.write(
+            f'{kind}: {len(latencies)} запросов, '
+            f'{len(latencies) / duration:.1f} в секунду, '
+            f'p50 {percentile(latencies, 50):.1f} мс, '
+            f'p95 {percentile(latencies, 95):.1f} мс, '
+            f'p99 {percentile(latencies, 99):.1f} мс, '
+            f'ошибок {errors}'
+        )
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.performance import METRICS, TEMPLATE_METRICS, collected_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает статистику PerformanceMiddleware, которую процессы '
+        'сбросили в кэш PERF_CACHE_ALIAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести статистику как JSON.'
+        )
+
+    def handle(self, *args, **options):
+        collected = collected_stats()
+        if options['json']:
+            self.stdout.write(json.dumps(
+                collected, ensure_ascii=False, indent=2
+            ))
+            return
+        if not collected:
+            self.stdout.write(
+                'Статистики нет: включите PERF_SAMPLE_RATE и общий кэш.'
+            )
+            return
+        for name, process in sorted(collected.items()):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Процесс {name}'))
+            self.write_section(process['views'], METRICS)
+            self.stdout.write(self.style.MIGRATE_HEADING('Шаблоны'))
+            self.write_section(process.get('templates', {}), TEMPLATE_METRICS)
+
+    def write_section(self, section, metrics):
+        for key, summary in section.items():
+            self.stdout.write(
+                f'{key} — замеров {summary["requests"]}, '
+                f'в окне {summary["window"]}'
+            )
+            for metric in metrics:
+                values = summary[metric]
+                self.stdout.write(
+                    f'  {metric:<12} p50 {values["p50"]:>10}  '
+                    f'p95 {values["p95"]:>10}  max {values["max"]:>10}'
+                )
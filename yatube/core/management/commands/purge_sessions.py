@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sessions import SessionStore
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии пакетами, чтобы не блокировать базу '
+        'одной долгой транзакцией.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.SESSION_PURGE_BATCH_SIZE,
+            help='Сессий в одной транзакции.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между пакетами в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        purged = SessionStore.purge_expired(
+            options['batch_size'], options['pause']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено истёкших сессий: {purged}.'
+        ))
@@ -0,0 +1,35 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в SQLite-реплики: замена '
+        'репликации для проверки маршрутизации на одной машине.'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections['default'].settings_dict
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Команда работает только с SQLite.')
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                replica = connections[alias].settings_dict
+                if replica['ENGINE'] != 'django.db.backends.sqlite3':
+                    raise CommandError(f'Реплика {alias} — не SQLite.')
+                connections[alias].close()
+                target = sqlite3.connect(replica['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: {replica["NAME"]}')
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено реплик: {len(settings.DATABASE_REPLICAS)}.'
+        ))
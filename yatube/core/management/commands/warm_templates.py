@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templating import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Компилирует все шаблоны и сообщает о синтаксических ошибках.'
+
+    def handle(self, *args, **options):
+        compiled, errors = warm_templates()
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {compiled}.'
+        ))
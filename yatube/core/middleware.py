@@ -0,0 +1,117 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .performance import (flush_stats, install_template_timer, record_sample,
+                          start_sample, stop_sample)
+from .queries import QueryBudgetExceeded, QueryWatcher, execute_wrapper
+from .routers import use_replicas
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceMiddleware:
+    """Замеряет часть запросов: время view, запросы к базе, шаблоны, размер.
+
+    Доля замеряемых запросов задаётся PERF_SAMPLE_RATE; при нуле
+    middleware отключается целиком и ничего не стоит.
+    """
+
+    def __init__(self, get_response):
+        if settings.PERF_SAMPLE_RATE <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_SAMPLE_RATE
+        self.flush_interval = settings.PERF_FLUSH_INTERVAL
+        self.flushed = time.monotonic()
+        install_template_timer()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        sample = start_sample()
+        started = time.perf_counter()
+        try:
+            with execute_wrapper(sample.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            stop_sample()
+        wall_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        record_sample(
+            match.view_name if match else 'unresolved',
+            sample,
+            wall_ms,
+            0 if response.streaming else len(response.content),
+        )
+        if time.monotonic() - self.flushed >= self.flush_interval:
+            self.flushed = time.monotonic()
+            flush_stats()
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Ловит N+1 и медленные страницы в отладке и CI.
+
+    Режим QUERY_BUDGET_MODE: 'log' пишет нарушения в лог, 'raise'
+    бросает QueryBudgetExceeded; пустое значение отключает middleware.
+    """
+
+    def __init__(self, get_response):
+        if settings.QUERY_BUDGET_MODE not in ('log', 'raise'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.mode = settings.QUERY_BUDGET_MODE
+
+    def __call__(self, request):
+        watcher = QueryWatcher()
+        with execute_wrapper(watcher):
+            response = self.get_response(request)
+        problems = watcher.violations(
+            max_repeats=settings.QUERY_BUDGET_MAX_REPEATS,
+            max_ms=settings.QUERY_BUDGET_MAX_MS,
+        )
+        if problems:
+            message = '{} {}: {}'.format(
+                request.method, request.path, '; '.join(problems)
+            )
+            if self.mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning('Бюджет запросов превышен: %s', message)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Решает, можно ли запросу читать с реплик.
+
+    Запросы, меняющие данные, работают только с основной базой и ставят
+    cookie на REPLICA_PIN_SECONDS: следующая страница (например, профиль
+    после создания поста) тоже читается с основной базы, пока реплики
+    догоняют.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        pinned = settings.REPLICA_PIN_COOKIE in request.COOKIES
+        use_replicas(safe and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replicas(False)
+        if not safe:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
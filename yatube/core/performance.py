@@ -0,0 +1,203 @@
+import os
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+from .benchmark import percentile
+
+METRICS = ('wall_ms', 'db_ms', 'db_queries', 'template_ms', 'size')
+
+TEMPLATE_METRICS = ('render_ms',)
+
+# Список процессов: process → время последнего сброса. Снимки лежат под
+# своими ключами и истекают, если процесс перестал их обновлять.
+CACHE_KEY = 'core:performance'
+
+_local = threading.local()
+
+
+class Sample:
+    """Замеры одного запроса; заполняются по ходу его обработки."""
+
+    __slots__ = (
+        'db_ms', 'db_queries', 'template_ms', 'templates', '_template_depth'
+    )
+
+    def __init__(self):
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.template_ms = 0.0
+        # Время каждого шаблона вместе с вложенными в него include.
+        self.templates = defaultdict(float)
+        self._template_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.db_queries += 1
+
+
+def current_sample():
+    return getattr(_local, 'sample', None)
+
+
+def start_sample():
+    _local.sample = Sample()
+    return _local.sample
+
+
+def stop_sample():
+    _local.sample = None
+
+
+_template_render = Template.render
+
+
+def _timed_render(self, context):
+    sample = current_sample()
+    if sample is None:
+        return _template_render(self, context)
+    # В общее время идут только внешние шаблоны: {% include %}
+    # считается в составе своего родителя, чтобы не сложиться дважды.
+    sample._template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _template_render(self, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        sample._template_depth -= 1
+        sample.templates[self.name or '<string>'] += elapsed
+        if not sample._template_depth:
+            sample.template_ms += elapsed
+
+
+def install_template_timer():
+    Template.render = _timed_render
+
+
+class Stats:
+    """Скользящие окна последних замеров по каждому view или шаблону."""
+
+    def __init__(self, window, metrics=METRICS):
+        self.window = window
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = defaultdict(self._new_key)
+            self.totals = defaultdict(int)
+
+    def _new_key(self):
+        return {metric: deque(maxlen=self.window) for metric in self.metrics}
+
+    def record(self, key, values):
+        with self.lock:
+            samples = self.samples[key]
+            for metric in self.metrics:
+                samples[metric].append(values[metric])
+            self.totals[key] += 1
+
+    def snapshot(self):
+        """Перцентили по каждому ключу из текущих окон."""
+        with self.lock:
+            keys = {
+                key: {metric: list(values) for metric, values in
+                      samples.items()}
+                for key, samples in self.samples.items()
+            }
+            totals = dict(self.totals)
+        return {
+            key: summarize(metrics, totals[key])
+            for key, metrics in sorted(keys.items())
+        }
+
+
+def summarize(metrics, total):
+    window = len(next(iter(metrics.values())))
+    summary = {'requests': total, 'window': window}
+    for metric, values in metrics.items():
+        summary[metric] = {
+            'p50': round(percentile(values, 50), 2),
+            'p95': round(percentile(values, 95), 2),
+            'max': round(max(values), 2),
+        }
+    return summary
+
+
+stats = Stats(settings.PERF_WINDOW)
+
+template_stats = Stats(settings.PERF_WINDOW, TEMPLATE_METRICS)
+
+
+def record_sample(view, sample, wall_ms, size):
+    stats.record(view, {
+        'wall_ms': wall_ms,
+        'db_ms': sample.db_ms,
+        'db_queries': sample.db_queries,
+        'template_ms': sample.template_ms,
+        'size': size,
+    })
+    for name, render_ms in sample.templates.items():
+        template_stats.record(name, {'render_ms': render_ms})
+
+
+def snapshot():
+    return {
+        'views': stats.snapshot(),
+        'templates': template_stats.snapshot(),
+    }
+
+
+def process_name():
+    # pid в разных контейнерах повторяется, поэтому с именем хоста.
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def process_key(process):
+    return f'{CACHE_KEY}:{process}'
+
+
+def flush_stats():
+    """Кладёт снимок статистики процесса в общий кэш для команды.
+
+    У каждого процесса свой ключ со сроком PERF_STATS_TIMEOUT, поэтому
+    процессы не затирают снимки друг друга, а снимки завершившихся
+    процессов истекают. В общем списке процесс только отмечается: если
+    отметку затрёт соседний процесс, она вернётся при следующем сбросе.
+    """
+    perf_cache = caches[settings.PERF_CACHE_ALIAS]
+    now = time.time()
+    process = process_name()
+    perf_cache.set(
+        process_key(process),
+        {'updated': now, **snapshot()},
+        settings.PERF_STATS_TIMEOUT,
+    )
+    processes = {
+        name: updated
+        for name, updated in (perf_cache.get(CACHE_KEY) or {}).items()
+        if now - updated < settings.PERF_STATS_TIMEOUT
+    }
+    processes[process] = now
+    perf_cache.set(CACHE_KEY, processes, settings.PERF_STATS_TIMEOUT)
+
+
+def collected_stats():
+    """Снимки живых процессов: истёкшие ключи в ответ не попадают."""
+    perf_cache = caches[settings.PERF_CACHE_ALIAS]
+    processes = perf_cache.get(CACHE_KEY) or {}
+    found = perf_cache.get_many([process_key(name) for name in processes])
+    return {
+        name: found[process_key(name)]
+        for name in processes if process_key(name) in found
+    }
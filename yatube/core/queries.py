@@ -0,0 +1,82 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к странице нарушил бюджет запросов к базе."""
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """connection.execute_wrapper сразу для всех баз, включая реплики."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+def fingerprint(sql):
+    """Форма запроса: литералы и параметры заменены на ?, списки IN свёрнуты.
+
+    Запросы, отличающиеся только значениями, дают один отпечаток —
+    так N+1 виден как повторение одной формы.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryWatcher:
+    """Обёртка выполнения SQL, считающая запросы по отпечаткам.
+
+    Подключается через execute_wrapper(watcher).
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+        self.duration_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration_ms += (time.perf_counter() - started) * 1000
+            self.total += 1
+            self.counts[fingerprint(sql)] += 1
+
+    def repeated(self, max_repeats):
+        """Формы запросов, выполненные больше max_repeats раз."""
+        return [
+            (shape, count) for shape, count in self.counts.most_common()
+            if count > max_repeats
+        ]
+
+    def violations(self, max_repeats=None, max_queries=None, max_ms=None):
+        """Описания нарушений бюджета; пустой список, если всё в порядке."""
+        problems = []
+        if max_queries is not None and self.total > max_queries:
+            problems.append(
+                f'запросов {self.total}, допустимо {max_queries}'
+            )
+        if max_ms is not None and self.duration_ms > max_ms:
+            problems.append(
+                f'время в базе {self.duration_ms:.1f} мс, '
+                f'допустимо {max_ms} мс'
+            )
+        if max_repeats is not None:
+            for shape, count in self.repeated(max_repeats):
+                problems.append(f'{count} раз: {shape}')
+        return problems
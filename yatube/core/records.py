@@ -0,0 +1,68 @@
+import csv
+import json
+from itertools import islice
+
+FORMATS = ('jsonl', 'csv')
+
+# Сколько ошибок импорта хранить: память не растёт с размером файла.
+MAX_ERRORS = 20
+
+
+class RecordError(ValueError):
+    """Запись нельзя импортировать; импорт остальных продолжается."""
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def check_types(record, fields):
+    """Поля записи — строки или пусто.
+
+    В JSON Lines поле может оказаться числом или списком: такая запись
+    пропускается, а не роняет импорт.
+    """
+    for name in fields:
+        value = record.get(name)
+        if value is not None and not isinstance(value, str):
+            raise RecordError(f'поле {name} должно быть строкой')
+
+
+def write_records(records, stream, file_format, fields):
+    count = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, fields, restval='')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+        return count
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False))
+        stream.write('\n')
+        count += 1
+    return count
+
+
+def read_records(stream, file_format):
+    if file_format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key: value or None for key, value in row.items()}
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield record if isinstance(record, dict) else {'line': number}
@@ -0,0 +1,63 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def use_replicas(enabled):
+    """Разрешает или запрещает чтение с реплик в текущем потоке."""
+    _state.use_replicas = enabled
+
+
+def replicas_allowed():
+    return (
+        getattr(_state, 'use_replicas', False)
+        and not getattr(_state, 'primary_reads', 0)
+    )
+
+
+@contextmanager
+def primary_reads():
+    """Внутри блока (или view под @primary_reads()) читать с основной базы.
+
+    Нужен всему, что кэшируется или получает ETag под версией ленты:
+    версия лежит в общем кэше и уже учитывает последнюю запись, а
+    реплика может отставать сколько угодно, и её страница осталась бы
+    в кэше под новой версией до следующей записи.
+    """
+    _state.primary_reads = getattr(_state, 'primary_reads', 0) + 1
+    try:
+        yield
+    finally:
+        _state.primary_reads -= 1
+
+
+class ReplicaRouter:
+    """Чтение — с реплик DATABASE_REPLICAS, запись — в default.
+
+    С реплик читают только безопасные запросы, которым это разрешил
+    ReplicaPinningMiddleware. Управляющие команды, фоновые потоки и всё
+    после первой записи читают с основной базы, чтобы видеть свои же
+    изменения, которые до реплики ещё не дошли. Ленты и другие ответы
+    с кэшем по версии ленты читают с основной базы (primary_reads).
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and replicas_allowed():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        use_replicas(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в default.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными из основной базы.
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+from django.core.cache import caches
+from django.utils import timezone
+
+KEY_PREFIX = 'core.sessions.'
+
+
+class SessionStore(CachedDBStore):
+    """Сессии в кэше SESSION_CACHE_ALIAS с записью в базу.
+
+    В отличие от cached_db, в кэше лежат закодированные данные и срок
+    жизни, как в таблице django_session. Это позволяет не писать в базу
+    сессию, которая не изменилась: SessionMiddleware сохраняет её при любом
+    присваивании, даже того же значения. Срок жизни продлевается не чаще,
+    чем раз в половину SESSION_COOKIE_AGE.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        # (session_data, expire_date) в том виде, как они лежат в базе.
+        self._stored = None
+        super().__init__(session_key)
+
+    def load(self):
+        try:
+            stored = self._cache.get(self.cache_key)
+        except Exception:
+            stored = None
+        if stored is not None and stored[1] <= timezone.now():
+            stored = None
+        if stored is None:
+            session = self._get_session_from_db()
+            if session is None:
+                return {}
+            stored = (session.session_data, session.expire_date)
+            self._cache.set(
+                self.cache_key, stored,
+                self.get_expiry_age(expiry=session.expire_date)
+            )
+        self._stored = stored
+        return self.decode(stored[0])
+
+    def is_unchanged(self, session_data, expire_date):
+        if self._stored is None:
+            return False
+        stored_data, stored_expire_date = self._stored
+        # Срок продлевается, только если прибавка больше половины
+        # SESSION_COOKIE_AGE.
+        extension = expire_date - stored_expire_date
+        return (
+            stored_data == session_data
+            and extension <= timedelta(seconds=settings.SESSION_COOKIE_AGE / 2)
+        )
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        session = self.create_model_instance(data)
+        if not must_create and self.is_unchanged(
+            session.session_data, session.expire_date
+        ):
+            return
+        # Запись в базу той же транзакцией, что и у DBStore.
+        super(CachedDBStore, self).save(must_create)
+        self._stored = (session.session_data, session.expire_date)
+        self._cache.set(self.cache_key, self._stored, self.get_expiry_age())
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None or session_key == self._session_key:
+            self._stored = None
+
+    @classmethod
+    def purge_expired(cls, batch_size, pause=0):
+        """Удаляет истёкшие сессии пакетами, каждый своей транзакцией.
+
+        Короткие транзакции не держат блокировку SQLite долго, и запись
+        постов успевает проходить между пакетами. Возвращает число
+        удалённых сессий.
+        """
+        model = cls.get_model_class()
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        now = timezone.now()
+        purged = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=now).values_list(
+                    'session_key', flat=True
+                )[:batch_size]
+            )
+            if not keys:
+                return purged
+            model.objects.filter(session_key__in=keys).delete()
+            cache.delete_many([KEY_PREFIX + key for key in keys])
+            purged += len(keys)
+            if pause:
+                time.sleep(pause)
+
+    @classmethod
+    def clear_expired(cls):
+        cls.purge_expired(settings.SESSION_PURGE_BATCH_SIZE)
@@ -0,0 +1,36 @@
+import os
+
+from django.template import TemplateSyntaxError, engines
+
+
+def template_names(engine):
+    """Имена всех .html-шаблонов из каталогов DIRS движка."""
+    names = set()
+    for directory in engine.engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, directory))
+    return sorted(name.replace(os.sep, '/') for name in names)
+
+
+def warm_templates():
+    """Компилирует все шаблоны, чтобы cached loader не делал это в запросах.
+
+    Возвращает число скомпилированных шаблонов и словарь ошибок
+    {имя шаблона: текст ошибки}.
+    """
+    compiled = 0
+    errors = {}
+    for engine in engines.all():
+        if not hasattr(engine, 'engine'):
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                errors[name] = str(error)
+            else:
+                compiled += 1
+    return compiled, errors
@@ -0,0 +1,61 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет колбэки transaction.on_commit, добавленные внутри блока.
+
+    TestCase не фиксирует транзакцию, и колбэки иначе не запустились бы;
+    в Django 3.2 то же делает captureOnCommitCallbacks(execute=True).
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    for _, callback in connection.run_on_commit[start:]:
+        callback()
+
+
+@contextmanager
+def stale_replica(alias='replica'):
+    """Реплика — снимок основной SQLite-базы на момент входа в блок.
+
+    Записи внутри блока до неё не доходят, как до реплики, которую
+    sync_replicas давно не обновлял.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'replica.sqlite3')
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    # backup() ждал бы конца транзакции TestCase; дамп читает её данные.
+    # Строки виртуальных таблиц (FTS) пропускаются: они лежат в теневых.
+    virtual = [
+        f'INSERT INTO "{name}" ' for name, in primary.connection.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE sql LIKE 'CREATE VIRTUAL TABLE%'"
+        )
+    ]
+    target = sqlite3.connect(path)
+    try:
+        target.executescript('\n'.join(
+            line for line in primary.connection.iterdump()
+            if not line.startswith(tuple(virtual))
+        ))
+    finally:
+        target.close()
+    connections.databases[alias] = dict(primary.settings_dict, NAME=path)
+    try:
+        with override_settings(DATABASE_REPLICAS=[alias]):
+            yield connections[alias]
+    finally:
+        connections[alias].close()
+        del connections.databases[alias]
+        if hasattr(connections._connections, alias):
+            delattr(connections._connections, alias)
+        shutil.rmtree(directory)
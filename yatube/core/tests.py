@@ -0,0 +1,471 @@
+import asyncio
+import http.client
+import threading
+from datetime import timedelta
+from http import HTTPStatus
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .asgi import WsgiToAsgi, build_environ, serve
+from .checks import check_performance_settings
+from .performance import (collected_stats, current_sample, flush_stats,
+                          process_key, stats, template_stats)
+from .middleware import ReplicaPinningMiddleware
+from .queries import QueryBudgetExceeded, fingerprint
+from .routers import (ReplicaRouter, primary_reads, replicas_allowed,
+                      use_replicas)
+from .sessions import SessionStore
+from .templating import template_names, warm_templates
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=1, PERF_FLUSH_INTERVAL=0)
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='user')
+
+    def setUp(self):
+        stats.reset()
+        template_stats.reset()
+        caches['feeds'].clear()
+        self.client = Client()
+
+    def test_records_view_metrics(self):
+        """Замер запроса попадает в статистику своего view."""
+        self.client.get(reverse('posts:index'))
+        snapshot = stats.snapshot()
+        self.assertEqual(set(snapshot), {'posts:index'})
+        index = snapshot['posts:index']
+        self.assertEqual(index['requests'], 1)
+        self.assertGreater(index['db_queries']['max'], 0)
+        self.assertGreater(index['template_ms']['max'], 0)
+        self.assertGreater(index['size']['max'], 0)
+        self.assertLessEqual(
+            index['template_ms']['max'], index['wall_ms']['max']
+        )
+        self.assertIsNone(current_sample())
+
+    def test_records_template_metrics(self):
+        """Время include учитывается отдельно и входит во время страницы."""
+        self.client.get(reverse('posts:index'))
+        templates = template_stats.snapshot()
+        self.assertIn('posts/index.html', templates)
+        self.assertIn('includes/header.html', templates)
+        self.assertLessEqual(
+            templates['includes/header.html']['render_ms']['max'],
+            templates['posts/index.html']['render_ms']['max'],
+        )
+        self.assertLessEqual(
+            templates['posts/index.html']['render_ms']['max'],
+            stats.snapshot()['posts:index']['template_ms']['max'],
+        )
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_disabled_without_sampling(self):
+        """При PERF_SAMPLE_RATE=0 ничего не замеряется."""
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(stats.snapshot(), {})
+
+    def test_endpoint_for_staff_only(self):
+        """Статистику видит только персонал."""
+        url = reverse('performance_stats')
+        self.client.force_login(self.user)
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.FOUND
+        )
+        self.client.force_login(self.staff)
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('posts:index', response.json()['views'])
+
+    def test_management_command(self):
+        """Команда показывает статистику, сброшенную в кэш."""
+        self.client.get(reverse('posts:index'))
+        flush_stats()
+        stdout = StringIO()
+        call_command('performance_stats', stdout=stdout)
+        self.assertIn('posts:index', stdout.getvalue())
+        self.assertIn('wall_ms', stdout.getvalue())
+        self.assertIn('includes/header.html', stdout.getvalue())
+
+    def test_processes_flush_separately(self):
+        """Процессы не затирают снимки друг друга; истёкшие не видны."""
+        for name in ('web:1', 'web:2'):
+            with mock.patch(
+                'core.performance.process_name', return_value=name
+            ):
+                flush_stats()
+        self.assertEqual(set(collected_stats()), {'web:1', 'web:2'})
+        caches['feeds'].delete(process_key('web:1'))
+        self.assertEqual(set(collected_stats()), {'web:2'})
+
+
+class WarmTemplatesTest(TestCase):
+    def test_warm_templates(self):
+        """Все шаблоны проекта компилируются без ошибок."""
+        compiled, errors = warm_templates()
+        self.assertEqual(errors, {})
+        self.assertIn('includes/header.html', template_names(
+            engines['django']
+        ))
+        self.assertEqual(compiled, len(template_names(engines['django'])))
+
+    def test_warm_templates_command(self):
+        stdout = StringIO()
+        call_command('warm_templates', stdout=stdout)
+        self.assertIn('Скомпилировано', stdout.getvalue())
+
+
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        caches['feeds'].clear()
+
+    def test_fingerprint(self):
+        """Запросы, отличающиеся значениями, дают один отпечаток."""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id = 1 AND name = \'a\''),
+            fingerprint('SELECT *  FROM t WHERE id = 25 AND name = \'b\''),
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+    @override_settings(QUERY_BUDGET_MODE='raise', QUERY_BUDGET_MAX_REPEATS=0)
+    def test_raise_mode(self):
+        """В режиме raise повтор формы запроса — ошибка."""
+        with self.assertRaises(QueryBudgetExceeded):
+            Client().get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGET_MODE='log', QUERY_BUDGET_MAX_MS=0)
+    def test_log_mode(self):
+        """В режиме log нарушение пишется в лог, страница отдаётся."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('время в базе', logs.output[0])
+
+
+class PerformanceChecksTest(TestCase):
+    def check_ids(self):
+        return {
+            warning.id for warning in check_performance_settings(None)
+        }
+
+    @override_settings(DEBUG=True, SERVE_MEDIA=True, QUERY_BUDGET_MODE='log')
+    def test_flags_debug_settings(self):
+        """Отладочные настройки помечаются предупреждениями."""
+        self.assertTrue(
+            {'core.W001', 'core.W007', 'core.W008', 'core.W009',
+             'core.W010'} <= self.check_ids()
+        )
+
+    def test_prod_settings(self):
+        """Слой prod закрывает замечания по шаблонам, сессиям и middleware."""
+        from yatube.settings import prod
+
+        with self.settings(
+            TEMPLATES=prod.TEMPLATES,
+            SESSION_ENGINE=prod.SESSION_ENGINE,
+            MIDDLEWARE=prod.MIDDLEWARE,
+            CACHES=prod.CACHES,
+        ):
+            ids = self.check_ids()
+        self.assertFalse(
+            {'core.W001', 'core.W002', 'core.W004', 'core.W005',
+             'core.W006', 'core.W007', 'core.W009', 'core.W010'} & ids
+        )
+        self.assertTrue(all(
+            database['CONN_MAX_AGE'] for database in prod.DATABASES.values()
+        ))
+
+    def test_media_outside_repository(self):
+        """Слой test пишет файлы во временный каталог, а не в media проекта."""
+        self.assertFalse(
+            settings.MEDIA_ROOT.startswith(settings.BASE_DIR)
+        )
+
+
+class SessionStoreTest(TestCase):
+    def setUp(self):
+        caches['sessions'].clear()
+        self.session = SessionStore()
+        self.session['cart'] = [1, 2]
+        self.session.create()
+
+    def reload(self):
+        return SessionStore(self.session.session_key)
+
+    def session_writes(self, queries):
+        return [
+            query['sql'] for query in queries
+            if 'django_session' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ]
+
+    def test_reads_from_cache(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.reload()['cart'], [1, 2])
+        caches['sessions'].clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.reload()['cart'], [1, 2])
+
+    def test_unchanged_session_not_saved(self):
+        """Присваивание того же значения не пишет в базу."""
+        session = self.reload()
+        session['cart'] = [1, 2]
+        self.assertTrue(session.modified)
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_session_saved(self):
+        session = self.reload()
+        session['cart'].append(3)
+        session.modified = True
+        session.save()
+        caches['sessions'].clear()
+        self.assertEqual(self.reload()['cart'], [1, 2, 3])
+
+    def test_expiry_extended_after_half_age(self):
+        """Срок жизни продлевается, когда прошло больше половины."""
+        old_expire_date = timezone.now() + timedelta(
+            seconds=settings.SESSION_COOKIE_AGE / 3
+        )
+        Session.objects.filter(session_key=self.session.session_key).update(
+            expire_date=old_expire_date
+        )
+        caches['sessions'].clear()
+        session = self.reload()
+        session['cart'] = [1, 2]
+        session.save()
+        self.assertGreater(
+            Session.objects.get(
+                session_key=self.session.session_key
+            ).expire_date,
+            old_expire_date
+        )
+
+    def test_flush(self):
+        self.session.flush()
+        self.assertFalse(Session.objects.exists())
+        self.assertIsNone(caches['sessions'].get(
+            SessionStore.cache_key_prefix + str(self.session.session_key)
+        ))
+
+    def test_authenticated_requests_do_not_write(self):
+        """Запросы вошедшего пользователя не пишут сессию."""
+        client = Client()
+        client.force_login(User.objects.create_user(username='reader'))
+        client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('posts:index'))
+            client.get(reverse('about:author'))
+        self.assertEqual(self.session_writes(queries), [])
+        session_key = client.session.session_key
+        client.post(reverse('users:logout'))
+        self.assertFalse(
+            Session.objects.filter(session_key=session_key).exists()
+        )
+
+    def test_purge_sessions_command(self):
+        """Истёкшие сессии удаляются пакетами, живые остаются."""
+        expired = timezone.now() - timedelta(days=1)
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}',
+                session_data='',
+                expire_date=expired,
+            )
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                'purge_sessions', batch_size=2, stdout=StringIO()
+            )
+        self.assertEqual(len(self.session_writes(queries)), 3)
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            [self.session.session_key]
+        )
+
+
+class SqlitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_configured(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        # 1 — NORMAL; WAL у базы в памяти недоступен.
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+        self.assertEqual(self.pragma('temp_store'), 2)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.addCleanup(use_replicas, False)
+
+    def test_reads_from_primary_by_default(self):
+        """Без разрешения middleware чтение идёт с основной базы."""
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_reads_from_replicas_until_write(self):
+        """После записи поток до конца запроса читает с основной базы."""
+        use_replicas(True)
+        self.assertIn(
+            self.router.db_for_read(User), ('replica1', 'replica2')
+        )
+        self.assertEqual(self.router.db_for_write(User), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_primary_reads(self):
+        """Внутри primary_reads чтение идёт с основной базы."""
+        use_replicas(True)
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertNotEqual(self.router.db_for_read(User), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaPinningMiddlewareTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+        self.middleware = ReplicaPinningMiddleware(self.get_response)
+
+    def get_response(self, request):
+        self.seen.append(replicas_allowed())
+        return HttpResponse()
+
+    def test_safe_request_uses_replicas(self):
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(self.seen, [True])
+        self.assertNotIn('use_primary', response.cookies)
+        self.assertFalse(replicas_allowed())
+
+    def test_write_pins_next_requests(self):
+        """После POST клиент какое-то время читает с основной базы."""
+        response = self.middleware(self.factory.post('/create/'))
+        self.assertEqual(self.seen, [False])
+        cookie = response.cookies['use_primary']
+        self.assertEqual(cookie['max-age'], 5)
+        request = self.factory.get('/profile/author/')
+        request.COOKIES['use_primary'] = cookie.value
+        self.middleware(request)
+        self.assertEqual(self.seen, [False, False])
+
+
+def echo_application(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    body = environ['wsgi.input'].read()
+    return [
+        f'{environ["REQUEST_METHOD"]} {environ["PATH_INFO"]}'.encode(),
+        b' ' + threading.current_thread().name.encode(),
+        b' ' + body,
+    ]
+
+
+class AsgiAdapterTest(SimpleTestCase):
+    def call(self, application, scope, body=b''):
+        messages = [{'type': 'http.request', 'body': body}]
+        sent = []
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return sent
+
+    def test_build_environ(self):
+        """Путь, строка запроса и заголовки переходят в WSGI environ."""
+        environ = build_environ({
+            'method': 'GET',
+            'path': '/profile/юзер/',
+            'query_string': b'page=2',
+            'headers': [
+                (b'content-type', b'text/html'),
+                (b'cookie', b'a=1'),
+                (b'cookie', b'b=2'),
+            ],
+        }, BytesIO())
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/profile/юзер/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/html')
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+
+    def test_view_runs_in_pool(self):
+        """WSGI-приложение выполняется в потоке пула, тело доходит."""
+        application = WsgiToAsgi(echo_application, max_workers=2)
+        sent = self.call(
+            application,
+            {'type': 'http', 'method': 'POST', 'path': '/create/'},
+            body=b'text',
+        )
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertTrue(body.startswith(b'POST /create/ asgi'))
+        self.assertTrue(body.endswith(b' text'))
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def test_serve(self):
+        """Встроенный сервер отвечает на HTTP-запрос."""
+        application = WsgiToAsgi(echo_application, max_workers=1)
+        loop = asyncio.new_event_loop()
+        ports = []
+        ready = threading.Event()
+
+        def started(port):
+            ports.append(port)
+            ready.set()
+
+        task = loop.create_task(serve(application, '127.0.0.1', 0, started))
+
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.addCleanup(loop.close)
+        self.addCleanup(thread.join)
+        self.addCleanup(loop.call_soon_threadsafe, task.cancel)
+        self.assertTrue(ready.wait(5))
+        connection = http.client.HTTPConnection('127.0.0.1', ports[0])
+        connection.request('GET', '/about/author/')
+        response = connection.getresponse()
+        self.assertEqual(response.status, HTTPStatus.OK)
+        self.assertTrue(response.read().startswith(b'GET /about/author/'))
+        connection.close()
@@ -1,10 +1,11 @@
 from django.contrib import admin
 
 from .models import Group, Post
+from .search import filter_posts, is_search_available
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'slug', 'description')
+    list_display = ('pk', 'title', 'slug', 'description', 'posts_count')
     search_fields = ('title', 'description')
     empty_value_display = '-пусто-'
     prepopulated_fields = {'slug': ('title',)}
@@ -17,6 +18,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not is_search_available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return filter_posts(queryset, search_term), False
+
 
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from core.records import batched
+
+from .cache import (GROUP_LIST, INDEX_FEED, author_feed, group_feed,
+                    invalidate_counts, invalidate_pages)
+from .counters import recount_counters
+from .models import Group, Post, User
+from .search import is_search_available, rebuild_index
+from .timeline import rebuild_timeline
+
+
+@contextmanager
+def explicit_pub_date():
+    """Разрешает задать pub_date вручную: auto_now_add перезаписал бы её."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def bulk_insert(model, objects, batch_size):
+    count = 0
+    for batch in batched(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def invalidate_feeds(author_ids, group_ids):
+    """Сбрасывает главную и ленты этих авторов и групп.
+
+    Кэш лент не очищается целиком: в нём же лежат замеры
+    производительности (PERF_CACHE_ALIAS).
+    """
+    feeds = {INDEX_FEED}
+    feeds.update(author_feed(author_id) for author_id in author_ids)
+    feeds.update(group_feed(group_id) for group_id in group_ids)
+    invalidate_counts(feeds)
+    invalidate_pages(feeds | {GROUP_LIST})
+
+
+def refresh_derived_data(batch_size):
+    """Приводит производные данные в порядок после наполнения базы.
+
+    bulk_create не вызывает сигналы, поэтому счётчики, поисковый индекс
+    и лента главной пересчитываются целиком, а ленты сбрасываются.
+    """
+    recount_counters(batch_size=batch_size)
+    if is_search_available():
+        rebuild_index()
+    rebuild_timeline()
+    invalidate_feeds(
+        User.objects.values_list('id', flat=True),
+        Group.objects.values_list('id', flat=True),
+    )
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.routers import primary_reads
+
+INDEX_FEED = 'index'
+
+# Список групп с числом постов в каждой (JSON API).
+GROUP_LIST = 'groups'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def is_group_feed(feed):
+    return feed.startswith('group:')
+
+
+def feeds_for(author_id, group_id):
+    """Ленты, в которые попадает пост с такими автором и группой."""
+    feeds = {INDEX_FEED}
+    if author_id is not None:
+        feeds.add(author_feed(author_id))
+    if group_id is not None:
+        feeds.add(group_feed(group_id))
+    return feeds
+
+
+def get_feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def count_key(feed):
+    return f'posts:count:{feed}'
+
+
+def version_key(feed):
+    return f'posts:version:{feed}'
+
+
+def page_key(feed, version, path):
+    digest = hashlib.md5(path.encode()).hexdigest()
+    return f'posts:page:{feed}:{version}:{digest}'
+
+
+def get_feed_count(feed, count):
+    """Число постов ленты из кэша; count() вызывается только при промахе."""
+    feed_cache = get_feed_cache()
+    key = count_key(feed)
+    value = feed_cache.get(key)
+    if value is None:
+        # Число хранится до следующей записи: считается по основной базе.
+        with primary_reads():
+            value = count()
+        feed_cache.set(key, value, settings.FEED_COUNT_CACHE_TIMEOUT)
+    return value
+
+
+def invalidate_counts(feeds):
+    get_feed_cache().delete_many([count_key(feed) for feed in feeds])
+
+
+def new_version():
+    return f'{time.time():.6f}'
+
+
+def get_feed_version(feed):
+    """Версия ленты меняется при каждом изменении её постов.
+
+    При потере ключа создаётся новая версия, а не повторяется старая,
+    поэтому закэшированные страницы не воскресают.
+    """
+    feed_cache = get_feed_cache()
+    version = feed_cache.get(version_key(feed))
+    if version is None:
+        version = new_version()
+        feed_cache.add(version_key(feed), version, None)
+        version = feed_cache.get(version_key(feed), version)
+    return version
+
+
+def invalidate_pages(feeds):
+    version = new_version()
+    get_feed_cache().set_many(
+        {version_key(feed): version for feed in feeds}, None
+    )
+
+
+def is_page_cacheable(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+    )
+
+
+def get_cached_page(key):
+    return get_feed_cache().get(key)
+
+
+def set_cached_page(key, content):
+    get_feed_cache().set(key, content, settings.FEED_PAGE_CACHE_TIMEOUT)
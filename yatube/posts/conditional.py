@@ -0,0 +1,70 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .cache import author_feed, get_feed_version
+
+
+def make_etag(*parts):
+    value = ':'.join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+def viewer(request):
+    """Страницы отличаются для гостя и каждого пользователя (шапка, кнопки)."""
+    return request.user.pk if request.user.is_authenticated else 'anonymous'
+
+
+def shared_last_modified(request, timestamp):
+    """Last-Modified только для гостя.
+
+    Дата не зависит от пользователя: после входа или выхода клиент с
+    одним If-Modified-Since получил бы 304 и чужую шапку и кнопки.
+    Авторизованным страница проверяется только по ETag с viewer().
+    """
+    return None if request.user.is_authenticated else timestamp
+
+
+def feed_validators(request, feed, version):
+    """ETag и Last-Modified ленты по её версии, без запросов к базе.
+
+    Версия меняется при любом изменении постов ленты, включая удаление,
+    которое не видно по датам оставшихся постов.
+    """
+    return {
+        'etag': make_etag(feed, version, request.get_full_path(),
+                          viewer(request)),
+        'last_modified': shared_last_modified(request, int(float(version))),
+    }
+
+
+def post_validators(request, post, thumbnail_ready):
+    """ETag и Last-Modified страницы поста.
+
+    На странице есть число постов автора, поэтому учитывается и версия
+    ленты автора; готовность миниатюры меняет заглушку на картинку.
+    """
+    version = get_feed_version(author_feed(post.author_id))
+    return {
+        'etag': make_etag(post.pk, post.updated.timestamp(), version,
+                          thumbnail_ready, viewer(request)),
+        'last_modified': shared_last_modified(request, max(
+            timegm(post.updated.utctimetuple()), int(float(version))
+        )),
+    }
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304 (или 412), если у клиента актуальная копия, иначе None."""
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
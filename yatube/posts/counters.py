@@ -0,0 +1,116 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from core.records import batched
+
+from .cache import GROUP_LIST, invalidate_pages
+from .models import AuthorCounter, Group, Post
+
+
+def change_counters(author_id, group_id, delta):
+    """Меняет счётчики постов автора и группы на delta."""
+    if author_id is not None:
+        counters = AuthorCounter.objects.filter(author_id=author_id)
+        if delta < 0:
+            counters = counters.filter(posts_count__gte=-delta)
+        updated = counters.update(posts_count=F('posts_count') + delta)
+        if not updated and delta > 0:
+            counter, created = AuthorCounter.objects.get_or_create(
+                author_id=author_id,
+                defaults={'posts_count': delta}
+            )
+            if not created:
+                AuthorCounter.objects.filter(author_id=author_id).update(
+                    posts_count=F('posts_count') + delta
+                )
+    if group_id is not None:
+        groups = Group.objects.filter(pk=group_id)
+        if delta < 0:
+            groups = groups.filter(posts_count__gte=-delta)
+        groups.update(posts_count=F('posts_count') + delta)
+
+
+def move_counters(previous, author_id, group_id):
+    """Переносит пост между счётчиками при смене автора или группы."""
+    if previous['author_id'] != author_id:
+        change_counters(previous['author_id'], None, -1)
+        change_counters(author_id, None, 1)
+    if previous['group_id'] != group_id:
+        change_counters(None, previous['group_id'], -1)
+        change_counters(None, group_id, 1)
+
+
+def id_batches(ids, batch_size):
+    """id порциями для IN; None — все записи одним проходом."""
+    if ids is None:
+        return [None]
+    return batched(sorted(ids), batch_size)
+
+
+def drifted_groups(group_ids):
+    groups = Group.objects.annotate(actual=Count('posts')).exclude(
+        posts_count=F('actual')
+    )
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    groups = list(groups)
+    for group in groups:
+        group.posts_count = group.actual
+    return groups
+
+
+def drifted_authors(author_ids):
+    posts = Post.objects.exclude(author=None)
+    counters = AuthorCounter.objects.all()
+    if author_ids is not None:
+        posts = posts.filter(author_id__in=author_ids)
+        counters = counters.filter(author_id__in=author_ids)
+    actual = dict(
+        posts.values_list('author_id').annotate(Count('id')).order_by()
+    )
+    stored = dict(counters.values_list('author_id', 'posts_count'))
+    missing = [
+        AuthorCounter(author_id=author_id, posts_count=count)
+        for author_id, count in actual.items()
+        if author_id not in stored
+    ]
+    drifted = [
+        AuthorCounter(
+            author_id=author_id, posts_count=actual.get(author_id, 0)
+        )
+        for author_id, count in stored.items()
+        if actual.get(author_id, 0) != count
+    ]
+    return missing, drifted
+
+
+def recount_counters(batch_size=500, dry_run=False, author_ids=None,
+                     group_ids=None):
+    """Пересчитывает счётчики по таблице постов и исправляет расхождения.
+
+    author_ids и group_ids ограничивают пересчёт этими авторами и
+    группами (например, затронутыми импортом); по умолчанию — все.
+    Возвращает число исправленных групп и авторов.
+    """
+    fixed_groups = fixed_authors = 0
+    for ids in id_batches(group_ids, batch_size):
+        groups = drifted_groups(ids)
+        fixed_groups += len(groups)
+        if not dry_run:
+            Group.objects.bulk_update(
+                groups, ['posts_count'], batch_size=batch_size
+            )
+    for ids in id_batches(author_ids, batch_size):
+        missing, drifted = drifted_authors(ids)
+        fixed_authors += len(missing) + len(drifted)
+        if not dry_run:
+            with transaction.atomic():
+                AuthorCounter.objects.bulk_create(
+                    missing, batch_size=batch_size
+                )
+                AuthorCounter.objects.bulk_update(
+                    drifted, ['posts_count'], batch_size=batch_size
+                )
+    if fixed_groups and not dry_run:
+        invalidate_pages({GROUP_LIST})
+    return fixed_groups, fixed_authors
@@ -1,7 +1,53 @@
 from django import forms
+from django.conf import settings
+from PIL import Image
 
 from .models import Post
 
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF')
+
+
+class StreamedImageField(forms.ImageField):
+    """Проверяет картинку по заголовку, не декодируя её целиком."""
+
+    def to_python(self, data):
+        # Ошибку обработчика загрузки показываем раньше проверки на
+        # пустой файл: отвергнутая загрузка всегда имеет размер 0.
+        error = getattr(data, 'error', None)
+        if error:
+            raise forms.ValidationError(error, code='invalid_image')
+        uploaded = forms.FileField.to_python(self, data)
+        if uploaded is None:
+            return None
+        if hasattr(data, 'temporary_file_path'):
+            source = data.temporary_file_path()
+        else:
+            source = data
+        try:
+            # Image.open читает только заголовок файла.
+            with Image.open(source) as image:
+                image_format = image.format
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            raise forms.ValidationError(
+                self.error_messages['invalid_image'], code='invalid_image'
+            )
+        finally:
+            if hasattr(data, 'seek'):
+                data.seek(0)
+        if image_format not in IMAGE_FORMATS:
+            raise forms.ValidationError(
+                self.error_messages['invalid_image'], code='invalid_image'
+            )
+        max_width, max_height = settings.POST_IMAGE_MAX_DIMENSIONS
+        if width > max_width or height > max_height:
+            raise forms.ValidationError(
+                f'Картинка больше {max_width}×{max_height} пикселей.',
+                code='invalid_image'
+            )
+        uploaded.content_type = Image.MIME.get(image_format)
+        return uploaded
+
 
 class PostForm(forms.ModelForm):
     class Meta:
@@ -11,3 +57,15 @@ class PostForm(forms.ModelForm):
             'text': 'Текст нового поста',
             'group': 'Группа, к которой будет относиться пост',
         }
+
+
+class PostImageForm(forms.ModelForm):
+    class Meta:
+        model = Post
+        fields = ('image',)
+        field_classes = {
+            'image': StreamedImageField,
+        }
+        help_texts = {
+            'image': 'Картинка к посту',
+        }
@@ -0,0 +1,98 @@
+import posixpath
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+
+from .models import Post
+
+IMAGES_DIR = 'posts'
+
+
+def image_file(name):
+    """FieldFile картинки поста с хранилищем поля, как у post.image."""
+    return Post(image=name).image
+
+
+def is_referenced(name):
+    return Post.objects.filter(image=name).exists()
+
+
+def is_recent(storage, name):
+    """Файл записан или загружен повторно недавно.
+
+    Пост, который на него сошлётся, может быть ещё не сохранён.
+    """
+    try:
+        modified = storage.get_modified_time(name)
+    except FileNotFoundError:
+        return False
+    grace = timedelta(seconds=settings.POST_IMAGE_GRACE_SECONDS)
+    return timezone.now() - modified < grace
+
+
+def release_image(name):
+    """Удаляет файл картинки и его миниатюры, если на него нет ссылок.
+
+    Недавние файлы не удаляются: их позже уберёт collect_images.
+    """
+    if not name or is_referenced(name):
+        return False
+    image = image_file(name)
+    if is_recent(image.storage, name):
+        return False
+    delete_thumbnails(image, delete_file=False)
+    image.storage.delete(name)
+    return True
+
+
+def stored_images(storage, path=IMAGES_DIR):
+    """Все файлы под path в хранилище."""
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for filename in files:
+        yield posixpath.join(path, filename)
+    for directory in directories:
+        yield from stored_images(storage, posixpath.join(path, directory))
+
+
+def collect_images(dry_run=False):
+    """Удаляет файлы картинок, на которые не ссылается ни один пост."""
+    storage = Post._meta.get_field('image').storage
+    referenced = set(
+        Post.objects.exclude(image='').values_list('image', flat=True)
+    )
+    removed = [
+        name for name in stored_images(storage)
+        if name not in referenced and not is_recent(storage, name)
+    ]
+    if not dry_run:
+        for name in removed:
+            release_image(name)
+    return removed
+
+
+def rehash_images():
+    """Переносит картинки со старыми именами в хранилище по хэшу.
+
+    Байт-в-байт одинаковые файлы сливаются в один. Возвращает число
+    перенесённых имён.
+    """
+    names = Post.objects.exclude(image='').values_list(
+        'image', flat=True
+    ).distinct().order_by()
+    moved = 0
+    for name in list(names):
+        image = image_file(name)
+        if not image.storage.exists(name):
+            continue
+        with image.storage.open(name) as content:
+            if image.storage.hashed_name(name, content) == name:
+                continue
+            new_name = image.storage.save(name, content)
+        Post.objects.filter(image=name).update(image=new_name)
+        release_image(name)
+        moved += 1
+    return moved
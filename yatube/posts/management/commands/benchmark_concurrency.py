@@ -0,0 +1,135 @@
+import multiprocessing
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import percentile
+from posts.models import Post
+
+User = get_user_model()
+
+WRITER_USERNAME = 'benchmark_writer'
+
+
+def close_connections():
+    # После fork соединения родителя использовать нельзя.
+    for connection in connections.all():
+        connection.close()
+
+
+def run_worker(number, duration, write_ratio, seed):
+    """Цикл одного воркера: чтение ленты вперемешку с созданием постов."""
+    rng = random.Random(seed + number)
+    client = Client()
+    client.force_login(User.objects.get(username=WRITER_USERNAME))
+    index_url = reverse('posts:index')
+    create_url = reverse('posts:post_create')
+    result = {'reads': [], 'writes': [], 'errors': 0}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        is_write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if is_write:
+                response = client.post(
+                    create_url, {'text': f'Пост воркера {number}'}
+                )
+            else:
+                response = client.get(
+                    f'{index_url}?page={rng.randint(1, 5)}'
+                )
+        except Exception:
+            # Тестовый клиент пробрасывает исключения view, в том числе
+            # «database is locked».
+            result['errors'] += 1
+            continue
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            result['errors'] += 1
+            continue
+        result['writes' if is_write else 'reads'].append(elapsed * 1000)
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает базу параллельными процессами: чтение ленты и создание '
+        'постов, как несколько воркеров gunicorn. Выводит пропускную '
+        'способность, задержки и число ошибок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число процессов; 1 — в текущем процессе.'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки в секундах.'
+        )
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля запросов на запись.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора запросов.'
+        )
+
+    def handle(self, *args, **options):
+        writer, created = User.objects.get_or_create(
+            username=WRITER_USERNAME
+        )
+        last_post_id = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        jobs = [
+            (number, options['duration'], options['write_ratio'],
+             options['seed'])
+            for number in range(options['workers'])
+        ]
+        started = time.perf_counter()
+        try:
+            if options['workers'] > 1:
+                close_connections()
+                context = multiprocessing.get_context('fork')
+                with context.Pool(
+                    options['workers'], initializer=close_connections
+                ) as pool:
+                    results = pool.starmap(run_worker, jobs)
+            else:
+                results = [run_worker(*job) for job in jobs]
+        finally:
+            self.cleanup(writer, created, last_post_id)
+        elapsed = time.perf_counter() - started
+
+        reads = [value for result in results for value in result['reads']]
+        writes = [value for result in results for value in result['writes']]
+        errors = sum(result['errors'] for result in results)
+        total = len(reads) + len(writes)
+        self.stdout.write(
+            f'Воркеров {options["workers"]}, {elapsed:.1f} с: '
+            f'{total} запросов, {total / elapsed:.1f} в секунду, '
+            f'ошибок {errors}.'
+        )
+        for name, values in (('чтение', reads), ('запись', writes)):
+            if values:
+                self.stdout.write(
+                    f'{name}: {len(values)}, '
+                    f'p50 {percentile(values, 50):.1f} мс, '
+                    f'p95 {percentile(values, 95):.1f} мс'
+                )
+
+    def cleanup(self, writer, created, last_post_id):
+        # Как cleanup_post_create в benchmark_views: посты воркеров
+        # удаляются через ORM, и сигналы возвращают счётчики, поиск и
+        # ленту главной к прежнему виду, а следующий прогон идёт на тех
+        # же данных.
+        Post.objects.filter(pk__gt=last_post_id, author=writer).delete()
+        if created:
+            writer.delete()
@@ -0,0 +1,214 @@
+import json
+import random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import compare, measure
+from posts.models import Group, Post
+
+User = get_user_model()
+
+SCENARIOS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'post_create',
+    'api_posts',
+)
+
+SAMPLE_SIZE = 1000
+
+BENCHMARK_POST_TEXT = 'Пост из нагрузочного теста'
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет основные страницы через тестовый клиент и выводит '
+        'перцентили времени ответа, число запросов и пик памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Число замеряемых запросов на сценарий.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Число прогревочных запросов на сценарий.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', choices=SCENARIOS,
+            help='Сценарий для замера; по умолчанию все.'
+        )
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Читать ленты гостем, через кэш страниц.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора выбора страниц.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить результаты в JSON-файл.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON-файл прошлого прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20,
+            help='Допустимый рост p95 относительно baseline, в процентах.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.author = User.objects.filter(
+            post_counter__posts_count__gt=0
+        ).order_by('-post_counter__posts_count').first()
+        if self.author is None:
+            raise CommandError(
+                'В базе нет постов: сначала запустите seed_database.'
+            )
+        self.user_client = Client()
+        self.user_client.force_login(self.author)
+        self.reader = Client() if options['anonymous'] else self.user_client
+        self.errors = 0
+
+        results = {}
+        for name in options['scenario'] or SCENARIOS:
+            request = getattr(self, f'request_{name}')()
+            cleanup = getattr(self, f'cleanup_{name}', None)
+            try:
+                results[name] = measure(
+                    request, options['requests'], options['warmup']
+                )
+            finally:
+                if cleanup is not None:
+                    cleanup()
+            self.stdout.write(self.format_result(name, results[name]))
+
+        if self.errors:
+            self.stderr.write(f'Ответов с ошибкой: {self.errors}.')
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = compare(
+                    results, json.load(baseline), options['threshold']
+                )
+            if regressions:
+                raise CommandError(
+                    'Регрессия производительности:\n'
+                    + '\n'.join(regressions)
+                )
+
+    def format_result(self, name, result):
+        return (
+            f'{name:<12} p50 {result["p50_ms"]:>8} мс  '
+            f'p95 {result["p95_ms"]:>8} мс  p99 {result["p99_ms"]:>8} мс  '
+            f'запросов {result["queries"]:>3}  '
+            f'память {result["peak_kib"]:>8} КиБ'
+        )
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code >= 400:
+            self.errors += 1
+        return response
+
+    def sample_post_ids(self):
+        bounds = Post.objects.order_by('pk').values_list('pk', flat=True)
+        first, last = bounds.first(), bounds.last()
+        candidates = [
+            self.rng.randint(first, last) for _ in range(SAMPLE_SIZE)
+        ]
+        return list(
+            Post.objects.filter(pk__in=candidates).values_list('pk', flat=True)
+        )
+
+    def request_index(self):
+        def request():
+            page = self.rng.randint(1, 50)
+            self.get(self.reader, f'{reverse("posts:index")}?page={page}')
+        return request
+
+    def request_group_posts(self):
+        slugs = list(
+            Group.objects.filter(posts_count__gt=0).values_list(
+                'slug', flat=True
+            )[:SAMPLE_SIZE]
+        )
+        if not slugs:
+            raise CommandError('В базе нет групп с постами.')
+
+        def request():
+            self.get(self.reader, reverse(
+                'posts:group_list', kwargs={'slug': self.rng.choice(slugs)}
+            ))
+        return request
+
+    def request_profile(self):
+        usernames = list(
+            User.objects.filter(post_counter__posts_count__gt=0).values_list(
+                'username', flat=True
+            )[:SAMPLE_SIZE]
+        )
+
+        def request():
+            self.get(self.reader, reverse(
+                'posts:profile',
+                kwargs={'username': self.rng.choice(usernames)}
+            ))
+        return request
+
+    def request_post_detail(self):
+        post_ids = self.sample_post_ids()
+
+        def request():
+            self.get(self.reader, reverse(
+                'posts:post_detail',
+                kwargs={'post_id': self.rng.choice(post_ids)}
+            ))
+        return request
+
+    def request_post_create(self):
+        url = reverse('posts:post_create')
+        self.last_post_id = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+
+        def request():
+            response = self.user_client.post(
+                url, {'text': BENCHMARK_POST_TEXT}
+            )
+            if response.status_code != 302:
+                self.errors += 1
+        return request
+
+    def cleanup_post_create(self):
+        # Созданные посты удаляются, чтобы таблица не росла от прогона к
+        # прогону и сравнение с --baseline шло на тех же данных. Удаление
+        # через ORM вызывает сигналы: счётчики, поиск и лента главной
+        # возвращаются к прежнему виду. Откат транзакции не подходит:
+        # внутри неё не выполнились бы колбэки on_commit, а они часть
+        # замеряемой работы.
+        Post.objects.filter(
+            pk__gt=self.last_post_id,
+            author=self.author,
+            text=BENCHMARK_POST_TEXT,
+        ).delete()
+
+    def request_api_posts(self):
+        # Та же лента, что на главной, но JSON без рендера шаблона;
+        # идём по ссылкам next, чтобы не попадать в кэш первой страницы.
+        first = f'{reverse("api:posts")}?limit={settings.NUMBER_OF_POSTS}'
+        state = {'url': first}
+
+        def request():
+            response = self.get(self.reader, state['url'])
+            if response.status_code == 200:
+                state['url'] = response.json()['next'] or first
+        return request
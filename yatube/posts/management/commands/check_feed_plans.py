@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.queryplans import check_feed_plans, explain, feed_querysets
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет EXPLAIN QUERY PLAN запросов лент: '
+        'без полного прохода по таблице и сортировки во временном B-дереве.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов доступна только для SQLite.')
+        if options['verbosity'] > 1:
+            for name, queryset in feed_querysets():
+                self.stdout.write(f'{name}: {"; ".join(explain(queryset))}')
+        degraded = check_feed_plans()
+        if degraded:
+            raise CommandError('\n'.join(
+                f'{name}: {"; ".join(plan)}'
+                for name, plan in degraded.items()
+            ))
+        self.stdout.write(self.style.SUCCESS('Планы запросов в порядке.'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import collect_images, rehash_images
+
+
+class Command(BaseCommand):
+    help = 'Удаляет картинки постов, на которые не осталось ссылок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rehash', action='store_true',
+            help='Сначала перенести старые файлы в хранилище по хэшу.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать файлы, которые будут удалены.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rehash'] and not options['dry_run']:
+            moved = rehash_images()
+            self.stdout.write(f'Перенесено картинок: {moved}.')
+        removed = collect_images(dry_run=options['dry_run'])
+        if options['verbosity'] > 1 or options['dry_run']:
+            for name in removed:
+                self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Без ссылок картинок: {len(removed)}.'
+        ))
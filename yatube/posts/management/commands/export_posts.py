@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.records import FORMATS, guess_format, write_records
+from posts.transfer import FIELDS, export_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы и посты в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; «-» — стандартный вывод.'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        records = export_records(options['batch_size'])
+        started = time.perf_counter()
+        if path == '-':
+            count = write_records(records, sys.stdout, file_format, FIELDS)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = write_records(
+                    records, stream, file_format, FIELDS
+                )
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {count} за {elapsed:.1f} с '
+            f'({count / max(elapsed, 1e-9):.0f} в секунду).'
+        ))
@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.records import FORMATS, guess_format, read_records
+from posts.transfer import Importer
+
+
+class Command(BaseCommand):
+    help = 'Загружает группы и посты из JSON Lines или CSV пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл для загрузки; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пакета bulk_create.'
+        )
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать неизвестных авторов вместо пропуска постов.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        importer = Importer(
+            batch_size=options['batch_size'],
+            create_authors=options['create_authors'],
+        )
+        started = time.perf_counter()
+        if path == '-':
+            created = importer.run(read_records(sys.stdin, file_format))
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                created = importer.run(read_records(stream, file_format))
+        elapsed = time.perf_counter() - started
+        for error in importer.errors:
+            self.stderr.write(error)
+        rows = sum(created.values()) - created['authors'] + importer.skipped
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано групп {created["groups"]}, постов {created["posts"]}, '
+            f'авторов {created["authors"]}; пропущено {importer.skipped}. '
+            f'{rows} строк за {elapsed:.1f} с '
+            f'({rows / max(elapsed, 1e-9):.0f} в секунду).'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import is_search_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов (SQLite FTS5).'
+
+    def handle(self, *args, **options):
+        if not is_search_available():
+            raise CommandError('Поиск доступен только для SQLite.')
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {count}.'
+        ))
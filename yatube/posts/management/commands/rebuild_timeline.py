@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает готовую ленту главной из таблицы постов.'
+
+    def handle(self, *args, **options):
+        count = rebuild_timeline()
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов в ленте: {count}.'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов авторов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Размер пакета при обновлении счётчиков.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не меняя.'
+        )
+
+    def handle(self, *args, **options):
+        groups, authors = recount_counters(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} расхождений: групп {groups}, авторов {authors}.'
+        ))
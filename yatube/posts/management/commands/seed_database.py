@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import seed_database
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу пользователями, группами и постами для нагрузки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100_000,
+            help='Сколько пользователей создать.'
+        )
+        parser.add_argument(
+            '--groups', type=int, default=10_000,
+            help='Сколько групп создать.'
+        )
+        parser.add_argument(
+            '--posts', type=int, default=1_000_000,
+            help='Сколько постов создать.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Размер пакета bulk_create.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора, чтобы данные повторялись.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = seed_database(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей {created["users"]}, '
+            f'групп {created["groups"]}, постов {created["posts"]} '
+            f'за {elapsed:.1f} с.'
+        ))
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import Post
+from posts.thumbnails import make_thumbnail
+
+
+def warm(name):
+    try:
+        return make_thumbnail(name)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Заранее создаёт миниатюры картинок существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков, создающих миниатюры.'
+        )
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).distinct().order_by()
+        executor = None
+        if options['workers'] > 1:
+            executor = ThreadPoolExecutor(options['workers'])
+            results = executor.map(warm, names.iterator())
+        else:
+            results = map(make_thumbnail, names.iterator())
+        count = failed = 0
+        try:
+            for done in results:
+                if done:
+                    count += 1
+                else:
+                    failed += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово миниатюр: {count}.'
+        ))
+        if failed:
+            self.stderr.write(f'Не удалось создать миниатюр: {failed}.')
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:26
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    AuthorCounter = apps.get_model('posts', 'AuthorCounter')
+    for group in Group.objects.annotate(actual=Count('posts')):
+        group.posts_count = group.actual
+        group.save(update_fields=['posts_count'])
+    AuthorCounter.objects.bulk_create(
+        AuthorCounter(author_id=row['author_id'], posts_count=row['actual'])
+        for row in Post.objects.exclude(author=None).values(
+            'author_id'
+        ).annotate(actual=Count('id')).order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_post_ordering_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorCounter',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Число постов')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число постов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
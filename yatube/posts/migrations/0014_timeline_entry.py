@@ -0,0 +1,60 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timeline(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    posts = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-id'
+    )[:settings.TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        TimelineEntry(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            text=post.text,
+            author_id=post.author_id,
+            author_username=post.author.username if post.author else '',
+            author_first_name=post.author.first_name if post.author else '',
+            author_last_name=post.author.last_name if post.author else '',
+            group_id=post.group_id,
+            group_slug=post.group.slug if post.group else '',
+        )
+        for post in posts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_entry', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('author_username', models.CharField(blank=True, max_length=150)),
+                ('author_first_name', models.CharField(blank=True, max_length=30)),
+                ('author_last_name', models.CharField(blank=True, max_length=150)),
+                ('group_slug', models.SlugField(blank=True, db_index=False)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'ordering': ['-pub_date', '-post_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['-pub_date', '-post'], name='timeline_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -8,17 +10,42 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Имя группы')
     slug = models.SlugField(unique=True, verbose_name='Адрес')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов'
+    )
 
     def __str__(self):
         return self.title[:15]
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для ленты: автор и группа одним запросом, без лишних полей."""
+        return self.select_related('author', 'group').only(
+            'id',
+            'text',
+            'pub_date',
+            'author_id',
+            'group_id',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__slug',
+        )
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст')
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         null=True,
@@ -37,11 +64,100 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        db_index=True
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    def __str__(self):
+        return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        # Счётчики постов обновляются в сигналах той же транзакцией.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    class Meta:
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Карточка поста в готовой ленте главной страницы.
+
+    Хранит поля, нужные шаблону ленты, чтобы первые страницы главной
+    не сортировали всю таблицу постов. Заполняется сигналами posts.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='timeline_entry',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    text = models.TextField(verbose_name='Текст')
+    author = models.ForeignKey(
+        User,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
     )
+    author_username = models.CharField(max_length=150, blank=True)
+    author_first_name = models.CharField(max_length=30, blank=True)
+    author_last_name = models.CharField(max_length=150, blank=True)
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    group_slug = models.SlugField(blank=True, db_index=False)
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-post_id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-post'],
+                name='timeline_pub_date_idx'
+            ),
+        ]
+
+
+class AuthorCounter(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_counter',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
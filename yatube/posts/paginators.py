@@ -0,0 +1,175 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import get_feed_count
+from .models import Post
+from .timeline import timeline_after, timeline_slice
+
+# Границы INTEGER в SQLite (и bigint в других базах).
+MIN_ID = -2 ** 63
+
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(pub_date, pk):
+    """Курсор поста: дата публикации и id, как в Post.Meta.ordering."""
+    value = f'{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Возвращает (pub_date, id) или None для испорченного курсора.
+
+    Id вне 64-битного INTEGER и даты, которые не переводятся в UTC,
+    вызвали бы OverflowError в SQLite, поэтому курсор с ними испорчен.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor.encode()).decode()
+        pub_date, pk = value.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+        if pub_date is not None:
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date, timezone.utc)
+            pub_date = pub_date.astimezone(timezone.utc)
+    except (binascii.Error, UnicodeError, ValueError, OverflowError):
+        return None
+    if pub_date is None or not MIN_ID <= pk <= MAX_ID:
+        return None
+    return pub_date, pk
+
+
+def filter_after(queryset, cursor):
+    """Посты ленты, идущие после курсора."""
+    pub_date, pk = cursor
+    # Условие без OR, чтобы SQLite шёл по индексу (pub_date, id).
+    return queryset.filter(pub_date__lte=pub_date).exclude(
+        pub_date=pub_date, pk__gte=pk
+    )
+
+
+class FeedPage(Page):
+    @property
+    def page_window(self):
+        """Номера страниц вокруг текущей вместо всего page_range."""
+        size = self.paginator.page_window_size
+        first = max(self.number - size, 1)
+        last = min(self.number + size, self.paginator.num_pages)
+        return range(first, last + 1)
+
+    @property
+    def next_cursor(self):
+        if not self.paginator.cursor_pagination:
+            return None
+        if not self.has_next() or not self.object_list:
+            return None
+        post = self.object_list[len(self.object_list) - 1]
+        return encode_cursor(post.pub_date, post.pk)
+
+
+class CursorPage(FeedPage):
+    """Страница, выбранная по курсору: без COUNT(*) и OFFSET."""
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_next):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return True
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class FeedPaginator(Paginator):
+    """Paginator ленты постов с режимом курсора ?after=<cursor>.
+
+    Если передано имя ленты feed, число постов берётся из кэша.
+    """
+
+    page_window_size = 2
+    cursor_pagination = True
+
+    def __init__(self, object_list, per_page, feed=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.feed = feed
+
+    @cached_property
+    def count(self):
+        if self.feed is None:
+            return super().count
+        return get_feed_count(self.feed, self.object_list.count)
+
+    def get_page(self, number, after=None):
+        if after:
+            cursor = decode_cursor(after)
+            if cursor is not None:
+                return self.page_after(cursor)
+        return super().get_page(number)
+
+    def posts_after(self, cursor):
+        return filter_after(self.object_list, cursor)
+
+    def page_after(self, cursor):
+        posts = list(self.posts_after(cursor)[:self.per_page + 1])
+        return CursorPage(
+            posts[:self.per_page],
+            self,
+            has_next=len(posts) > self.per_page,
+        )
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+class SearchPaginator(FeedPaginator):
+    """Постранично делит список id из поиска и загружает посты страницы."""
+
+    cursor_pagination = False
+
+    def _get_page(self, object_list, number, paginator):
+        posts = Post.objects.feed().in_bulk(object_list)
+        return super()._get_page(
+            [posts[pk] for pk in object_list if pk in posts],
+            number,
+            paginator
+        )
+
+
+class TimelinePaginator(FeedPaginator):
+    """Paginator главной: страницы берутся из готовой ленты TimelineEntry.
+
+    Если лента не покрывает страницу целиком (глубокие страницы, лента ещё
+    не построена), посты читаются из таблицы, как в FeedPaginator.
+    """
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = min(bottom + self.per_page, self.count)
+        posts = timeline_slice(bottom, top)
+        if posts is None:
+            return super().page(number)
+        return self._get_page(posts, number, self)
+
+    def page_after(self, cursor):
+        posts = timeline_after(cursor, self.per_page + 1)
+        if posts is None:
+            return super().page_after(cursor)
+        return CursorPage(posts[:self.per_page], self, has_next=True)
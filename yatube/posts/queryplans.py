@@ -0,0 +1,45 @@
+from django.db import connection
+from django.utils import timezone
+
+from .models import Post
+from .paginators import FeedPaginator
+
+
+def feed_querysets():
+    """Запросы страниц лент: по номеру страницы и по курсору."""
+    feeds = {
+        'index': Post.objects.feed(),
+        'group': Post.objects.feed().filter(group_id=1),
+        'author': Post.objects.feed().filter(author_id=1),
+    }
+    cursor = (timezone.now(), 1)
+    for name, posts in feeds.items():
+        paginator = FeedPaginator(posts, 10)
+        yield f'{name} page', posts[20:30]
+        yield f'{name} cursor', paginator.posts_after(cursor)[:11]
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_degraded(plan):
+    """Полный проход по таблице или сортировка во временном B-дереве."""
+    return any(
+        step.startswith('USE TEMP B-TREE')
+        or (step.startswith('SCAN') and 'INDEX' not in step)
+        for step in plan
+    )
+
+
+def check_feed_plans():
+    """Возвращает словарь {запрос: план} для деградировавших запросов."""
+    degraded = {}
+    for name, queryset in feed_querysets():
+        plan = explain(queryset)
+        if is_degraded(plan):
+            degraded[name] = plan
+    return degraded
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def is_search_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """Слова запроса ищутся как префиксы; синтаксис FTS5 экранируется."""
+    words = query.split()
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+class SearchResults:
+    """id постов по запросу, от самых релевантных.
+
+    Paginator берёт у объекта count() и срез страницы, и оба выполняются
+    в SQLite: страница — через LIMIT/OFFSET, число найденных постов
+    считается не дальше SEARCH_MAX_RESULTS. Все id в память не читаются.
+    """
+
+    def __init__(self, query):
+        self.match = build_match_query(query)
+        if not is_search_available():
+            self.match = ''
+
+    def execute(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if not self.match:
+            return 0
+        rows = self.execute(
+            f'SELECT COUNT(*) FROM (SELECT 1 FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s LIMIT %s)',
+            [self.match, settings.SEARCH_MAX_RESULTS]
+        )
+        return rows[0][0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('SearchResults поддерживает только срезы.')
+        start = index.start or 0
+        stop = settings.SEARCH_MAX_RESULTS
+        if index.stop is not None:
+            stop = min(index.stop, stop)
+        if not self.match or stop <= start:
+            return []
+        rows = self.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+            [self.match, stop - start, start]
+        )
+        return [row[0] for row in rows]
+
+
+def search_post_ids(query):
+    """id постов, подходящих под запрос; выбираются срезами."""
+    return SearchResults(query)
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, подходящие под запрос, без выборки id."""
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+    ))
+
+
+def index_post(post):
+    if not is_search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def unindex_post(post_id):
+    if not is_search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_posts_after(post_id):
+    """Добавляет в индекс посты с id больше post_id; возвращает их число.
+
+    Так индексируются посты, созданные bulk_create, без перестройки
+    всего индекса.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid > %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post WHERE id > %s', [post_id]
+        )
+        return cursor.rowcount
+
+
+def rebuild_index():
+    """Заново заполняет поисковый индекс; возвращает число постов."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+        count = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+    return count
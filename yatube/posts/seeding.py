@@ -0,0 +1,91 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .bulk import bulk_insert, explicit_pub_date, refresh_derived_data
+from .models import Group, Post
+
+User = get_user_model()
+
+SEED_PREFIX = 'seed'
+
+WORDS = (
+    'утро', 'город', 'дорога', 'лес', 'река', 'книга', 'друг', 'письмо',
+    'вечер', 'поезд', 'море', 'кофе', 'работа', 'музыка', 'дождь', 'сад',
+    'новость', 'зима', 'лето', 'код', 'тест', 'кошка', 'окно', 'небо',
+)
+
+
+def make_text(rng, words=(8, 60)):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(*words))).capitalize()
+
+
+def seeded_users():
+    return User.objects.filter(username__startswith=f'{SEED_PREFIX}_user_')
+
+
+def seeded_groups():
+    return Group.objects.filter(slug__startswith=f'{SEED_PREFIX}-group-')
+
+
+def seed_users(count, batch_size):
+    # Нумерация продолжается, чтобы повторный запуск не упёрся в unique.
+    start = seeded_users().count()
+    # Один хэш на всех: хэширование пароля дороже самой вставки.
+    password = make_password(None)
+    return bulk_insert(User, (
+        User(username=f'{SEED_PREFIX}_user_{number}', password=password)
+        for number in range(start, start + count)
+    ), batch_size)
+
+
+def seed_groups(count, batch_size, rng):
+    start = seeded_groups().count()
+    return bulk_insert(Group, (
+        Group(
+            title=f'Группа {number}',
+            slug=f'{SEED_PREFIX}-group-{number}',
+            description=make_text(rng, (5, 20)),
+        )
+        for number in range(start, start + count)
+    ), batch_size)
+
+
+def seed_posts(count, batch_size, rng, days=365):
+    author_ids = list(seeded_users().values_list('id', flat=True))
+    group_ids = list(seeded_groups().values_list('id', flat=True))
+    if not author_ids:
+        return 0
+    now = timezone.now()
+    step = timedelta(days=days) / max(count, 1)
+
+    def posts():
+        for number in range(count):
+            yield Post(
+                text=make_text(rng),
+                author_id=rng.choice(author_ids),
+                # Примерно треть постов без группы, как в живой ленте.
+                group_id=(
+                    rng.choice(group_ids)
+                    if group_ids and rng.random() > 0.3 else None
+                ),
+                pub_date=now - step * (count - number),
+            )
+
+    with explicit_pub_date():
+        return bulk_insert(Post, posts(), batch_size)
+
+
+def seed_database(users, groups, posts, batch_size=5000, seed=0):
+    """Наполняет базу пользователями, группами и постами."""
+    rng = random.Random(seed)
+    created = {
+        'users': seed_users(users, batch_size),
+        'groups': seed_groups(groups, batch_size, rng),
+        'posts': seed_posts(posts, batch_size, rng),
+    }
+    refresh_derived_data(batch_size)
+    return created
@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.db import transaction
+from django.dispatch import receiver
+
+from .cache import (GROUP_LIST, INDEX_FEED, author_feed, feeds_for,
+                    group_feed, invalidate_counts, invalidate_pages,
+                    is_group_feed)
+from .counters import change_counters, move_counters
+from .images import release_image
+from .models import Group, Post, TimelineEntry
+from .search import index_post, unindex_post
+from .thumbnails import schedule_thumbnail
+from .timeline import add_post, top_up, update_post
+
+User = get_user_model()
+
+AUTHOR_CARD_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def invalidate_on_commit(counts=(), pages=()):
+    """Сбрасывает счётчики и версии лент после фиксации транзакции.
+
+    До фиксации параллельный запрос увидел бы новую версию, но старые
+    данные и закэшировал бы их под новой версией.
+    """
+    counts, pages = set(counts), set(pages)
+    # Число постов группы выводится и в списке групп.
+    if any(is_group_feed(feed) for feed in counts):
+        pages.add(GROUP_LIST)
+
+    def invalidate():
+        invalidate_counts(counts)
+        invalidate_pages(pages)
+    transaction.on_commit(invalidate)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, raw=False, **kwargs):
+    instance._previous = None
+    if instance.pk is not None and not raw:
+        instance._previous = Post.objects.filter(pk=instance.pk).values(
+            'author_id', 'group_id', 'image'
+        ).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    feeds = feeds_for(instance.author_id, instance.group_id)
+    previous = getattr(instance, '_previous', None)
+    changed_counts = set()
+    if created:
+        change_counters(instance.author_id, instance.group_id, 1)
+        changed_counts = feeds
+        add_post(instance)
+    elif previous is not None:
+        old_feeds = feeds_for(previous['author_id'], previous['group_id'])
+        move_counters(previous, instance.author_id, instance.group_id)
+        changed_counts = feeds ^ old_feeds
+        feeds |= old_feeds
+    if not created:
+        update_post(instance)
+    invalidate_on_commit(changed_counts, feeds)
+    index_post(instance)
+    name = instance.image.name
+    if name and (previous is None or previous['image'] != name):
+        transaction.on_commit(lambda: schedule_thumbnail(name))
+    if previous is not None and previous['image'] not in ('', name):
+        transaction.on_commit(lambda: release_image(previous['image']))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_counters(instance.author_id, instance.group_id, -1)
+    feeds = feeds_for(instance.author_id, instance.group_id)
+    invalidate_on_commit(feeds, feeds)
+    unindex_post(instance.pk)
+    # Карточка удалена каскадом, на её место встаёт следующий пост.
+    top_up()
+    name = instance.image.name
+    if name:
+        transaction.on_commit(lambda: release_image(name))
+
+
+def group_feeds(group):
+    """Группа выводится в ленте группы, на главной и в лентах авторов."""
+    author_ids = Post.objects.filter(group=group).exclude(
+        author=None
+    ).values_list('author_id', flat=True).distinct().order_by()
+    feeds = {INDEX_FEED, group_feed(group.pk)}
+    feeds.update(author_feed(author_id) for author_id in author_ids)
+    return feeds
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        invalidate_on_commit(pages={GROUP_LIST})
+        return
+    TimelineEntry.objects.filter(group=instance).update(
+        group_slug=instance.slug
+    )
+    invalidate_on_commit(pages=group_feeds(instance) | {GROUP_LIST})
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_feeds(sender, instance, **kwargs):
+    instance._feeds = group_feeds(instance)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    invalidate_on_commit(
+        pages=getattr(instance, '_feeds', set()) | {GROUP_LIST}
+    )
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, raw=False, update_fields=None,
+                 **kwargs):
+    if created or raw:
+        return
+    # Вход на сайт сохраняет только last_login, карточки не трогаем.
+    if update_fields and not AUTHOR_CARD_FIELDS & update_fields:
+        return
+    TimelineEntry.objects.filter(author=instance).update(
+        author_username=instance.username,
+        author_first_name=instance.first_name,
+        author_last_name=instance.last_name,
+    )
+    # Имя автора выводится в лентах его постов и в JSON API.
+    group_ids = Post.objects.filter(author=instance).exclude(
+        group=None
+    ).values_list('group_id', flat=True).distinct().order_by()
+    feeds = {INDEX_FEED, author_feed(instance.pk)}
+    feeds.update(group_feed(group_id) for group_id in group_ids)
+    invalidate_on_commit(pages=feeds)
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Называет файлы по SHA-256 содержимого.
+
+    Одинаковые загрузки превращаются в один файл posts/ab/abcdef….gif,
+    который повторно не записывается.
+    """
+
+    def hashed_name(self, name, content):
+        # Потоковая загрузка уже посчитала хэш, пока писала файл.
+        hexdigest = getattr(content, 'sha256', None)
+        if hexdigest is None:
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            content.seek(0)
+            hexdigest = digest.hexdigest()
+        dirname, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return posixpath.join(dirname, hexdigest[:2], hexdigest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Свежее время изменения не даёт сборщику удалить файл, пока
+            # пост с этой картинкой ещё не сохранён (posts.images).
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        return super().save(name, content, max_length=max_length)
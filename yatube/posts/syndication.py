@@ -0,0 +1,145 @@
+from io import StringIO
+from itertools import chain
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator, timezone
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .cache import get_cached_page, get_feed_version, page_key, set_cached_page
+from .conditional import make_etag, not_modified, set_validators
+
+
+class StreamingFeedMixin:
+    """Пишет ленту по частям: заголовок, каждый пост, закрывающие теги.
+
+    feedgenerator собирает все элементы в self.items и пишет ленту
+    целиком; здесь в self.items всегда лежит только текущий пост.
+    """
+
+    def latest_post_date(self):
+        return self.latest
+
+    def stream(self, items):
+        items = iter(items)
+        first = next(items, None)
+        # Посты идут от новых к старым: дата ленты — дата первого.
+        self.latest = first['pubdate'] if first else timezone.now()
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, settings.DEFAULT_CHARSET)
+        self.write_head(handler)
+        yield self.flush(buffer)
+        if first is not None:
+            for item in chain([first], items):
+                self.items = []
+                self.add_item(**item)
+                self.write_items(handler)
+                yield self.flush(buffer)
+        self.write_tail(handler)
+        yield self.flush(buffer)
+
+    def flush(self, buffer):
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk.encode(settings.DEFAULT_CHARSET)
+
+
+class StreamingRssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+class StreamingAtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        handler.endElement('feed')
+
+
+FEED_FORMATS = {
+    'rss': StreamingRssFeed,
+    'atom': StreamingAtomFeed,
+}
+
+
+def feed_items(request, posts):
+    """Элементы ленты; посты читаются из базы порциями через iterator()."""
+    posts = posts.feed()[:settings.SYNDICATION_ITEMS]
+    for post in posts.iterator(chunk_size=settings.NUMBER_OF_POSTS):
+        link = request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        yield {
+            'title': Truncator(post.text).chars(60),
+            'link': link,
+            'unique_id': link,
+            'description': post.text,
+            'pubdate': post.pub_date,
+            'author_name': (
+                post.author.get_full_name() or post.author.username
+                if post.author_id else None
+            ),
+            'categories': [post.group.slug] if post.group_id else [],
+        }
+
+
+def caching_stream(chunks, key):
+    """Отдаёт части ответа и, дойдя до конца, кладёт ответ в кэш лент."""
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        yield chunk
+    set_cached_page(key, b''.join(content))
+
+
+def syndication_response(request, feed, feed_format, posts, title, link,
+                         description):
+    """RSS или Atom ленты feed из постов posts.
+
+    ETag и Last-Modified — по версии ленты, как у HTML-страниц: она
+    меняется при добавлении, правке и удалении постов и известна без
+    запроса к базе. Готовая лента кэшируется до смены версии.
+
+    Посты читаются уже при отдаче ответа, после ReplicaPinningMiddleware,
+    то есть с основной базы, как и у view под primary_reads.
+    """
+    feed_class = FEED_FORMATS[feed_format]
+    version = get_feed_version(feed)
+    url = request.build_absolute_uri()
+    validators = {
+        'etag': make_etag('syndication', feed, version, url),
+        'last_modified': int(float(version)),
+    }
+    response = not_modified(request, **validators)
+    if response is not None:
+        return response
+    key = page_key(feed, version, url)
+    content = get_cached_page(key)
+    if content is not None:
+        response = HttpResponse(content)
+    else:
+        generator = feed_class(
+            title=title,
+            link=request.build_absolute_uri(link),
+            description=description,
+            feed_url=url,
+            language=settings.LANGUAGE_CODE,
+        )
+        response = StreamingHttpResponse(caching_stream(
+            generator.stream(feed_items(request, posts)), key
+        ))
+    response['Content-Type'] = feed_class.content_type
+    return set_validators(response, **validators)
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.benchmark import compare, percentile
+from ..models import AuthorCounter, Group, Post
+from ..search import search_post_ids
+
+User = get_user_model()
+
+
+class BenchmarkHelpersTest(TestCase):
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_compare(self):
+        """Рост p95 сверх порога и рост числа запросов — регрессия."""
+        baseline = {
+            'index': {'p95_ms': 10, 'queries': 3},
+            'profile': {'p95_ms': 10, 'queries': 3},
+        }
+        results = {
+            'index': {'p95_ms': 11, 'queries': 3},
+            'profile': {'p95_ms': 13, 'queries': 4},
+            'post_detail': {'p95_ms': 100, 'queries': 10},
+        }
+        regressions = compare(results, baseline, threshold=20)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(
+            line.startswith('profile') for line in regressions
+        ))
+
+
+class SeedAndBenchmarkCommandsTest(TestCase):
+    def setUp(self):
+        caches['feeds'].clear()
+        call_command(
+            'seed_database', users=5, groups=2, posts=40, batch_size=7,
+            stdout=StringIO()
+        )
+
+    def test_seed_database(self):
+        """Посты получают разные даты, а счётчики и поиск — актуальны."""
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count(), 40
+        )
+        self.assertEqual(
+            sum(AuthorCounter.objects.values_list('posts_count', flat=True)),
+            40
+        )
+        text = Post.objects.first().text.split()[0]
+        self.assertTrue(search_post_ids(text))
+
+    def test_seed_database_twice(self):
+        """Повторный запуск дописывает данные, не нарушая unique."""
+        call_command(
+            'seed_database', users=2, groups=1, posts=0, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 7)
+        self.assertEqual(Group.objects.count(), 3)
+
+    def test_benchmark_views(self):
+        """Прогон пишет результаты по всем сценариям в JSON."""
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        stdout = StringIO()
+        call_command(
+            'benchmark_views', requests=3, warmup=1, output=path,
+            stdout=stdout
+        )
+        with open(path) as output:
+            results = json.load(output)
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_detail', 'post_create',
+            'api_posts',
+        })
+        for result in results.values():
+            self.assertEqual(result['requests'], 3)
+            self.assertGreater(result['queries'], 0)
+        self.assertIn('p95', stdout.getvalue())
+
+    def test_benchmark_post_create_leaves_no_posts(self):
+        """Сценарий post_create удаляет созданные им посты."""
+        counts = {
+            counter.author_id: counter.posts_count
+            for counter in AuthorCounter.objects.all()
+        }
+        call_command(
+            'benchmark_views', requests=3, warmup=2,
+            scenario=['post_create'], stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual({
+            counter.author_id: counter.posts_count
+            for counter in AuthorCounter.objects.all()
+        }, counts)
+
+    def test_benchmark_views_regression(self):
+        """Команда падает, если результат хуже baseline."""
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as baseline:
+            json.dump({'index': {'p95_ms': 0, 'queries': 0}}, baseline)
+        self.addCleanup(os.remove, path)
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark_views', requests=2, warmup=0, scenario=['index'],
+                baseline=path, stdout=StringIO()
+            )
+
+    def test_benchmark_concurrency(self):
+        """Однопроцессный прогон читает и пишет без ошибок и без следов."""
+        stdout = StringIO()
+        count = Post.objects.count()
+        call_command(
+            'benchmark_concurrency', workers=1, duration=0.5,
+            write_ratio=0.5, stdout=stdout
+        )
+        output = stdout.getvalue()
+        self.assertIn('ошибок 0', output)
+        self.assertIn('чтение', output)
+        self.assertIn('запись', output)
+        self.assertEqual(Post.objects.count(), count)
+        self.assertFalse(
+            User.objects.filter(username='benchmark_writer').exists()
+        )
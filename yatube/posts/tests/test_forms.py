@@ -1,7 +1,12 @@
+import hashlib
+import shutil
+import tempfile
 from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 from ..models import Group, Post
@@ -76,3 +81,105 @@ class PostPagesTests(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group.pk, form_data['group'])
         self.assertEqual(post.author, self.post.author)
+
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(THUMBNAIL_ASYNC=False)
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Testuser')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, content, name='small.gif'):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(name, content, 'image/gif'),
+            },
+        )
+
+    def assertImageRejected(self, response):
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['image_form'].errors)
+        self.assertFalse(Post.objects.exists())
+
+    def test_create_post_with_image(self):
+        """Картинка сохраняется под хэшем, посчитанным при загрузке."""
+        response = self.create_post(SMALL_GIF)
+        self.assertRedirects(
+            response,
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        post = Post.objects.get()
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
+        self.assertEqual(
+            post.image.name, f'posts/{digest[:2]}/{digest}.gif'
+        )
+        with post.image.open() as image:
+            self.assertEqual(image.read(), SMALL_GIF)
+
+    def test_edit_post_image(self):
+        """Картинку можно добавить при редактировании поста."""
+        post = Post.objects.create(text='Текст', author=self.user)
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={
+                'text': 'Текст',
+                'image': SimpleUploadedFile('small.gif', SMALL_GIF),
+            },
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.image)
+
+    @override_settings(POST_IMAGE_MAX_SIZE=16)
+    def test_too_large_image_rejected(self):
+        """Файл больше POST_IMAGE_MAX_SIZE отвергается."""
+        self.assertImageRejected(self.create_post(SMALL_GIF))
+
+    def test_not_image_rejected(self):
+        """Файл с чужой сигнатурой отвергается до записи на диск."""
+        self.assertImageRejected(
+            self.create_post(b'#!/bin/sh\necho', name='script.gif')
+        )
+
+    def test_too_large_dimensions_rejected(self):
+        """Размеры картинки проверяются по заголовку."""
+        huge_gif = SMALL_GIF[:6] + b'\xff\xff\xff\xff' + SMALL_GIF[10:]
+        self.assertImageRejected(self.create_post(huge_gif))
+
+    def test_csrf_still_checked(self):
+        """Перенос проверки CSRF внутрь view не отключает её."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'), data={'text': 'Без токена'}
+        )
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
+
+    def test_other_uploads_use_default_handlers(self):
+        """Вне формы поста загрузки не проверяются как картинки."""
+        request = RequestFactory().post('/', data={
+            'file': SimpleUploadedFile('notes.txt', b'plain text'),
+        })
+        self.assertEqual(request.FILES['file'].read(), b'plain text')
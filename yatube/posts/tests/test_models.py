@@ -1,10 +1,34 @@
+import os
+import shutil
+import tempfile
+import time
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
 
-from ..models import Group, Post
+from ..images import collect_images, release_image, stored_images
+from ..models import AuthorCounter, Group, Post
+from ..queryplans import check_feed_plans, explain, is_degraded
 
 User = get_user_model()
 
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
 
 class PostModelTest(TestCase):
     @classmethod
@@ -32,3 +56,163 @@ class PostModelTest(TestCase):
         group = self.group
         excepted = group.title[:15]
         self.assertEqual(excepted, str(group))
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug2',
+            description='Тестовое описание 2',
+        )
+
+    def assertCounters(self, author, group, group2):
+        self.group.refresh_from_db()
+        self.group2.refresh_from_db()
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.user).posts_count, author
+        )
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.group2.posts_count, group2)
+
+    def test_counters_follow_create_move_and_delete(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        self.assertCounters(1, 1, 0)
+        post.group = self.group2
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.group = None
+        post.save()
+        self.assertCounters(1, 0, 0)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_admin_list_editable_moves_counter(self):
+        """Смена группы в списке постов админки переносит счётчик."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '1',
+            'form-0-id': post.pk,
+            'form-0-group': self.group2.pk,
+            '_save': 'Сохранить',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertCounters(1, 0, 1)
+
+    def test_recount_posts_command_repairs_drift(self):
+        """Команда recount_posts исправляет рассинхронизацию счётчиков."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Текст', group=self.group)
+            for _ in range(3)
+        )
+        out = StringIO()
+        call_command('recount_posts', stdout=out)
+        self.assertIn('групп 1, авторов 1', out.getvalue())
+        self.assertCounters(3, 3, 0)
+
+
+class PostQueryPlansTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент идут по индексам, без сортировки в B-дереве."""
+        self.assertEqual(check_feed_plans(), {})
+        out = StringIO()
+        call_command('check_feed_plans', stdout=out)
+        self.assertIn('в порядке', out.getvalue())
+
+    def test_unindexed_order_is_detected(self):
+        """Сортировка по неиндексированному полю считается деградацией."""
+        self.assertTrue(is_degraded(explain(Post.objects.order_by('text'))))
+
+
+@override_settings(POST_IMAGE_GRACE_SECONDS=0)
+class PostImageStorageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.storage = Post._meta.get_field('image').storage
+
+    def create_post(self, content=SMALL_GIF, name='small.gif'):
+        return Post.objects.create(
+            text='Текст',
+            author=self.user,
+            image=SimpleUploadedFile(name, content, content_type='image/gif'),
+        )
+
+    def test_same_images_are_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом с именем по хэшу."""
+        first = self.create_post()
+        second = self.create_post(name='copy.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
+        )
+        self.assertEqual(list(stored_images(self.storage)), [first.image.name])
+
+    def test_image_released_when_last_reference_removed(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        first = self.create_post()
+        second = self.create_post()
+        name = first.image.name
+        first.delete()
+        self.assertFalse(release_image(name))
+        self.assertTrue(self.storage.exists(name))
+        second.delete()
+        self.assertTrue(release_image(name))
+        self.assertFalse(self.storage.exists(name))
+
+    def test_collect_images_command(self):
+        """collect_images удаляет файлы без ссылок и сливает дубликаты."""
+        post = self.create_post()
+        self.storage.save('posts/orphan.gif', ContentFile(b'orphan'))
+        legacy = FileSystemStorage().save(
+            'posts/legacy.gif', ContentFile(SMALL_GIF)
+        )
+        Post.objects.filter(pk=post.pk).update(image=legacy)
+        call_command('collect_images', '--rehash', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertRegex(post.image.name, r'^posts/[0-9a-f]{2}/')
+        self.assertEqual(list(stored_images(self.storage)), [post.image.name])
+
+    @override_settings(POST_IMAGE_GRACE_SECONDS=60)
+    def test_duplicate_upload_in_flight_is_kept(self):
+        """Повторная загрузка файла защищает его до сохранения поста."""
+        post = self.create_post()
+        name = post.image.name
+        old = time.time() - 120
+        os.utime(self.storage.path(name), (old, old))
+        # Форма сохранила тот же файл, но пост ещё не записан в базу.
+        self.storage.save('posts/copy.gif', ContentFile(SMALL_GIF))
+        post.delete()
+        self.assertFalse(release_image(name))
+        self.assertEqual(collect_images(), [])
+        self.assertTrue(self.storage.exists(name))
+        os.utime(self.storage.path(name), (old, old))
+        self.assertEqual(collect_images(), [name])
+        self.assertFalse(self.storage.exists(name))
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import run_on_commit
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+@override_settings(SYNDICATION_ITEMS=5)
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='Test_user', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        for i in range(8):
+            Post.objects.create(
+                text=f'Текст № {i}',
+                author=cls.user,
+                group=cls.group if i < 3 else None,
+            )
+        cls.rss_url = reverse('posts:index_syndication', args=['rss'])
+        cls.atom_url = reverse('posts:index_syndication', args=['atom'])
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.guest_client = Client()
+
+    def get_xml(self, url):
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return response, ElementTree.fromstring(content)
+
+    def test_rss(self):
+        """RSS главной: новейшие посты, не больше SYNDICATION_ITEMS."""
+        response, root = self.get_xml(self.rss_url)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/rss+xml'
+        ))
+        titles = [item.findtext('title') for item in root.iter('item')]
+        self.assertEqual(titles, [f'Текст № {i}' for i in range(7, 2, -1)])
+        self.assertIn('Имя Фамилия', ElementTree.tostring(root, 'unicode'))
+
+    def test_atom(self):
+        response, root = self.get_xml(self.atom_url)
+        self.assertTrue(response['Content-Type'].startswith(
+            'application/atom+xml'
+        ))
+        entries = root.findall(f'{ATOM}entry')
+        self.assertEqual(len(entries), 5)
+        newest = Post.objects.first()
+        link = entries[0].find(f'{ATOM}link').get('href')
+        self.assertTrue(link.endswith(
+            reverse('posts:post_detail', kwargs={'post_id': newest.pk})
+        ))
+
+    def test_group_and_profile_feeds(self):
+        _, root = self.get_xml(
+            reverse('posts:group_syndication', args=['test-slug', 'rss'])
+        )
+        self.assertEqual(len(list(root.iter('item'))), 3)
+        _, root = self.get_xml(
+            reverse('posts:profile_syndication', args=['Test_user', 'atom'])
+        )
+        self.assertEqual(len(root.findall(f'{ATOM}entry')), 5)
+        for url in (
+            reverse('posts:index_syndication', args=['json']),
+            reverse('posts:group_syndication', args=['missing', 'rss']),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cached_until_posts_change(self):
+        """Лента кэшируется и отвечает 304, пока не изменятся посты."""
+        first, _ = self.get_xml(self.rss_url)
+        with self.assertNumQueries(0):
+            cached, root = self.get_xml(self.rss_url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached['ETag'], first['ETag'])
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.rss_url, HTTP_IF_NONE_MATCH=first['ETag']
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.user)
+        response, root = self.get_xml(self.rss_url)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(root.find('channel/item/title').text, 'Новый пост')
+
+    def test_pages_link_feeds(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, self.rss_url)
+        self.assertContains(response, self.atom_url)
@@ -0,0 +1,113 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, TimelineEntry
+from ..timeline import rebuild_timeline
+
+User = get_user_model()
+
+
+@override_settings(TIMELINE_SIZE=15, NUMBER_OF_POSTS=10)
+class TimelineTests(TestCase):
+    def setUp(self):
+        caches['feeds'].clear()
+        self.guest_client = Client()
+        self.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        self.user = User.objects.create_user(
+            username='Test_user', first_name='Имя', last_name='Фамилия'
+        )
+        self.posts = [
+            Post.objects.create(
+                text=f'Текст № {i}', author=self.user, group=self.group
+            )
+            for i in range(20)
+        ]
+        self.index_url = reverse('posts:index')
+
+    def timeline_ids(self):
+        return list(TimelineEntry.objects.values_list('post_id', flat=True))
+
+    def feed_ids(self, limit=15):
+        return list(Post.objects.values_list('pk', flat=True)[:limit])
+
+    def test_new_posts_fill_timeline(self):
+        """Лента хранит TIMELINE_SIZE новейших постов."""
+        self.assertEqual(self.timeline_ids(), self.feed_ids())
+
+    def test_deleted_post_replaced(self):
+        """Удалённый пост уходит из ленты, его место занимает следующий."""
+        self.posts[-1].delete()
+        self.assertEqual(self.timeline_ids(), self.feed_ids())
+
+    def test_edits_update_cards(self):
+        """Правка поста, группы и автора меняет карточки."""
+        post = self.posts[-1]
+        post.text = 'Новый текст'
+        post.save()
+        self.group.slug = 'new-slug'
+        self.group.save()
+        self.user.first_name = 'Другое'
+        self.user.save()
+        entry = TimelineEntry.objects.get(post=post)
+        self.assertEqual(entry.text, 'Новый текст')
+        self.assertEqual(entry.group_slug, 'new-slug')
+        self.assertEqual(entry.author_first_name, 'Другое')
+
+    def test_first_page_from_timeline(self):
+        """Первая страница главной не читает таблицу постов."""
+        self.guest_client.get(self.index_url)
+        caches['feeds'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(self.index_url)
+        posts_selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "posts_post"')
+        ]
+        self.assertEqual(posts_selects, [])
+        page = response.context['page_obj']
+        self.assertEqual([post.pk for post in page], self.feed_ids(10))
+        self.assertEqual(page[0].author, self.user)
+        self.assertEqual(page[0].group, self.group)
+        self.assertContains(response, self.user.get_full_name())
+
+    def test_deep_pages_fall_back_to_posts(self):
+        """Страницы за пределами ленты берутся из таблицы постов."""
+        response = self.guest_client.get(self.index_url, {'page': 2})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            list(Post.objects.values_list('pk', flat=True)[10:20])
+        )
+        response = self.guest_client.get(self.index_url)
+        cursor = response.context['page_obj'].next_cursor
+        response = self.guest_client.get(self.index_url, {'after': cursor})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            list(Post.objects.values_list('pk', flat=True)[10:20])
+        )
+
+    def test_empty_timeline_falls_back_to_posts(self):
+        """Без построенной ленты главная читает таблицу постов."""
+        TimelineEntry.objects.all().delete()
+        response = self.guest_client.get(self.index_url)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.feed_ids(10)
+        )
+
+    def test_rebuild_timeline_command(self):
+        """Команда rebuild_timeline заполняет ленту заново."""
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(self.timeline_ids(), self.feed_ids())
+        self.assertEqual(rebuild_timeline(), 15)
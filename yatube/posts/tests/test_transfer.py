@@ -0,0 +1,177 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import INDEX_FEED, get_feed_version
+from ..models import AuthorCounter, Group, Post, TimelineEntry
+from ..search import search_post_ids
+from ..transfer import Importer
+
+User = get_user_model()
+
+
+class PostTransferCommandsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        Post.objects.create(
+            text='Пост в группе', author=self.user, group=self.group
+        )
+        Post.objects.create(text='Пост без группы', author=self.user)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write(self, name, content):
+        with open(self.path(name), 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return self.path(name)
+
+    def round_trip(self, name):
+        expected = list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        ))
+        call_command('export_posts', self.path(name), stderr=StringIO())
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        call_command('import_posts', self.path(name), stdout=StringIO())
+        self.assertEqual(list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        )), expected)
+        group = Group.objects.get(slug='group')
+        self.assertEqual(group.description, 'Описание')
+        self.assertEqual(group.posts_count, 1)
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка и загрузка JSON Lines сохраняют посты и группы."""
+        self.round_trip('posts.jsonl')
+
+    def test_csv_round_trip(self):
+        """Выгрузка и загрузка CSV сохраняют посты и группы."""
+        self.round_trip('posts.csv')
+
+    def test_import_updates_counters_and_search(self):
+        """После загрузки счётчики и поиск учитывают новые посты."""
+        path = self.write('new.jsonl', (
+            '{"type": "post", "text": "Импортированный пост", '
+            '"author": "author", "group": "group"}\n'
+        ))
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            AuthorCounter.objects.get(author=self.user).posts_count, 3
+        )
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 2)
+        self.assertEqual(len(search_post_ids('Импортированный')), 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            text='Импортированный пост'
+        ).exists())
+
+    def test_import_refreshes_only_touched_data(self):
+        """Пересчитываются только затронутые группы; кэш не очищается."""
+        other = Group.objects.create(title='Другая', slug='other')
+        Group.objects.filter(pk=other.pk).update(posts_count=99)
+        caches['feeds'].set('unrelated', 'value')
+        version = get_feed_version(INDEX_FEED)
+        Importer().run([{'type': 'post', 'text': 'Новый пост',
+                         'author': 'author', 'group': 'group'}])
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 2)
+        self.assertEqual(Group.objects.get(pk=other.pk).posts_count, 99)
+        self.assertEqual(caches['feeds'].get('unrelated'), 'value')
+        self.assertNotEqual(get_feed_version(INDEX_FEED), version)
+
+    def test_empty_import_skips_refresh(self):
+        """Если ничего не создано, производные данные не трогаются."""
+        importer = Importer()
+        with CaptureQueriesContext(connection) as queries:
+            importer.run([{'type': 'post', 'text': 'Чужой',
+                           'author': 'stranger'}])
+        self.assertEqual(len(queries), 0)
+
+    @override_settings(TIMELINE_SIZE=2)
+    def test_old_posts_do_not_rebuild_timeline(self):
+        """Посты старше ленты главной не перестраивают её."""
+        entries = list(TimelineEntry.objects.values_list('pk', flat=True))
+        Importer().run([{'type': 'post', 'text': 'Старый пост',
+                         'author': 'author',
+                         'pub_date': '2000-01-01T00:00:00+00:00'}])
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('pk', flat=True)),
+            entries
+        )
+        self.assertEqual(len(search_post_ids('Старый')), 1)
+
+    def test_import_skips_bad_records(self):
+        """Ошибочные строки пропускаются, остальные загружаются."""
+        path = self.write('bad.jsonl', '\n'.join((
+            '{"type": "post", "text": "Чужой", "author": "stranger"}',
+            '{"type": "post", "text": "Без группы", "author": "author",'
+            ' "group": "missing"}',
+            '{"type": "post", "text": "", "author": "author"}',
+            'не json',
+            '{"type": "post", "text": "Хороший", "author": "author"}',
+        )))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=stdout, stderr=stderr)
+        self.assertIn('пропущено 4', stdout.getvalue())
+        self.assertIn('неизвестный автор', stderr.getvalue())
+        self.assertTrue(Post.objects.filter(text='Хороший').exists())
+
+    def test_import_skips_records_with_wrong_types(self):
+        """Числа и списки вместо строк пропускаются, импорт продолжается."""
+        path = self.write('types.jsonl', '\n'.join((
+            '{"type": "post", "text": "Дата", "author": "author",'
+            ' "pub_date": 5}',
+            '{"type": "post", "text": "Автор", "author": ["author"]}',
+            '{"type": "group", "slug": {"a": 1}, "title": "Группа"}',
+            '{"type": ["post"], "text": "Тип"}',
+            '{"type": "post", "text": "Хороший", "author": "author"}',
+        )))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=stdout, stderr=stderr)
+        self.assertIn('пропущено 4', stdout.getvalue())
+        self.assertIn('поле author должно быть строкой', stderr.getvalue())
+        self.assertTrue(Post.objects.filter(text='Хороший').exists())
+
+    def test_interrupted_import_refreshes_counters(self):
+        """Если чтение оборвалось, сохранённые пакеты всё равно учтены."""
+        def records():
+            yield {'type': 'post', 'text': 'До обрыва', 'author': 'author',
+                   'group': 'group'}
+            raise OSError('обрыв чтения')
+
+        with self.assertRaises(OSError):
+            Importer(batch_size=1).run(records())
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 2)
+        self.assertEqual(len(search_post_ids('обрыва')), 1)
+
+    def test_import_creates_authors(self):
+        """С --create-authors неизвестные авторы создаются пакетом."""
+        path = self.write('authors.csv', (
+            'type,text,author\n'
+            'post,Первый,new_author\n'
+            'post,Второй,new_author\n'
+        ))
+        call_command(
+            'import_posts', path, create_authors=True, batch_size=1,
+            stdout=StringIO()
+        )
+        author = User.objects.get(username='new_author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(author.posts.count(), 2)
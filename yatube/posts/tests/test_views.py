@@ -1,8 +1,27 @@
+import base64
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post
+from core.testing import run_on_commit, stale_replica
+
+from ..cache import INDEX_FEED, get_feed_version
+from ..models import Group, Post, TimelineEntry
+from ..paginators import decode_cursor
+from ..thumbnails import generate_thumbnail
+from ..timeline import rebuild_timeline
 
 User = get_user_model()
 
@@ -57,6 +76,7 @@ class PostPagesTests(TestCase):
         }
 
     def setUp(self):
+        caches['feeds'].clear()
         self.guest_client = Client()
         self.authorized_client = Client(self.user)
         self.authorized_client.force_login(self.user)
@@ -187,3 +207,572 @@ class PostPagesTests(TestCase):
         for object in response.context['page_obj']:
             post_slug = object.group.slug
             self.assertNotEqual(post_slug, self.group.slug)
+
+
+class PostFeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(
+            username='Test_user',
+            first_name='Имя',
+            last_name='Фамилия',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Текст № {i}', author=cls.user, group=cls.group)
+            for i in range(25)
+        )
+        # bulk_create не вызывает сигналы, ленту главной строим сами.
+        rebuild_timeline()
+        cls.feed_urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+        )
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.guest_client = Client()
+
+    def count_queries(self, url):
+        caches['feeds'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_feed_queries_do_not_depend_on_page_size(self):
+        """Число запросов ленты не зависит от количества постов на странице."""
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                with self.settings(NUMBER_OF_POSTS=1):
+                    single = self.count_queries(url)
+                with self.settings(NUMBER_OF_POSTS=20):
+                    many = self.count_queries(url)
+                self.assertEqual(single, many)
+
+    def test_feed_renders_author_and_group_without_extra_queries(self):
+        """Автор и группа поста выбираются вместе с постами."""
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, self.user.get_full_name())
+        self.assertContains(response, self.group.slug)
+
+
+class PostFeedCursorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        Post.objects.bulk_create(
+            Post(text=f'Текст № {i}', author=cls.user) for i in range(25)
+        )
+        cls.index_url = reverse('posts:index')
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.guest_client = Client()
+
+    def test_cursor_pages_cover_whole_feed(self):
+        """Переход по ссылкам ?after= обходит всю ленту без пропусков."""
+        response = self.guest_client.get(self.index_url)
+        seen = [post.pk for post in response.context['page_obj']]
+        cursor = response.context['page_obj'].next_cursor
+        while cursor:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guest_client.get(
+                    self.index_url, {'after': cursor}
+                )
+            sql = ' '.join(query['sql'] for query in queries)
+            self.assertNotIn('COUNT', sql)
+            self.assertNotIn('OFFSET', sql)
+            seen += [post.pk for post in response.context['page_obj']]
+            cursor = response.context['page_obj'].next_cursor
+        self.assertEqual(
+            seen, list(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(self.index_url, {'after': 'broken'})
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_out_of_range_cursor_falls_back_to_first_page(self):
+        """Id и даты, которые не помещаются в SQLite, не роняют ленту."""
+        group = Group.objects.create(title='Группа', slug='group')
+        for value in ('2020-01-01T00:00:00+00:00|99999999999999999999999',
+                      '2020-01-01T00:00:00+00:00|-99999999999999999999999',
+                      '0001-01-01T00:00:00+05:00|5'):
+            cursor = base64.urlsafe_b64encode(value.encode()).decode()
+            self.assertIsNone(decode_cursor(cursor))
+            for url in (self.index_url, reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            )):
+                with self.subTest(value=value, url=url):
+                    response = self.guest_client.get(url, {'after': cursor})
+                    self.assertEqual(
+                        response.context['page_obj'].number, 1
+                    )
+
+    def test_page_number_links_still_work(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        response = self.guest_client.get(self.index_url, {'page': 3})
+        self.assertEqual(response.context['page_obj'].number, 3)
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+
+class PostFeedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.group2 = Group.objects.create(
+            title='test-title2',
+            slug='test-slug2',
+            description='test-decsr2',
+        )
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.group2_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group2.slug}
+        )
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.user, group=self.group
+        )
+
+    def get_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        counted = any('COUNT' in query['sql'] for query in queries)
+        return response.context['page_obj'].paginator.count, counted
+
+    def test_count_is_cached(self):
+        """Повторный запрос ленты не выполняет COUNT(*)."""
+        self.assertEqual(self.get_count(self.group_url), (1, True))
+        self.assertEqual(self.get_count(self.group_url), (1, False))
+
+    def test_count_invalidated_on_create_and_delete(self):
+        """Создание и удаление поста сбрасывают счётчик ленты."""
+        self.get_count(self.group_url)
+        with run_on_commit():
+            post = Post.objects.create(
+                text='Ещё текст', author=self.user, group=self.group
+            )
+        self.assertEqual(self.get_count(self.group_url), (2, True))
+        with run_on_commit():
+            post.delete()
+        self.assertEqual(self.get_count(self.group_url), (1, True))
+
+    def test_count_invalidated_on_group_change(self):
+        """Перенос поста в другую группу сбрасывает счётчики обеих групп."""
+        self.get_count(self.group_url)
+        self.get_count(self.group2_url)
+        self.post.group = self.group2
+        with run_on_commit():
+            self.post.save()
+        self.assertEqual(self.get_count(self.group_url), (0, True))
+        self.assertEqual(self.get_count(self.group2_url), (1, True))
+
+    def test_page_links_are_windowed(self):
+        """Паджинатор выводит ограниченное число ссылок на страницы."""
+        Post.objects.bulk_create(
+            Post(text=f'Текст № {i}', author=self.user) for i in range(200)
+        )
+        caches['feeds'].clear()
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'page': 10}
+        )
+        self.assertEqual(
+            list(response.context['page_obj'].page_window),
+            [8, 9, 10, 11, 12],
+        )
+        self.assertNotContains(response, '?page=2"')
+        self.assertContains(response, '?page=21"')
+
+
+class PostFeedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.group2 = Group.objects.create(
+            title='test-title2',
+            slug='test-slug2',
+            description='test-decsr2',
+        )
+        cls.index_url = reverse('posts:index')
+        cls.group_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.group2_url = reverse(
+            'posts:group_list', kwargs={'slug': cls.group2.slug}
+        )
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user}
+        )
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(
+            text='Первый текст', author=self.user, group=self.group
+        )
+
+    def assertCached(self, url, cached=True):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        # Главная читает посты из готовой ленты TimelineEntry.
+        tables = (Post._meta.db_table, TimelineEntry._meta.db_table)
+        posts_queried = any(
+            table in query['sql'] for query in queries for table in tables
+        )
+        self.assertEqual(posts_queried, not cached)
+        return response
+
+    def test_guest_pages_are_cached(self):
+        """Повторный запрос гостя отдаётся из кэша без запросов к БД."""
+        for url in (self.index_url, self.group_url, self.profile_url):
+            with self.subTest(url=url):
+                self.assertCached(url, cached=False)
+                response = self.assertCached(url)
+                self.assertContains(response, self.post.text)
+        self.assertCached(self.index_url + '?page=2', cached=False)
+
+    def test_authorized_pages_are_not_cached(self):
+        """Страницы для авторизованного пользователя не кэшируются."""
+        self.authorized_client.get(self.index_url)
+        self.assertCached(self.index_url, cached=False)
+
+    def test_post_change_invalidates_only_its_feeds(self):
+        """Изменение поста сбрасывает только ленты, где он выводится."""
+        for url in (self.index_url, self.group_url, self.group2_url):
+            self.guest_client.get(url)
+        self.post.text = 'Новый текст'
+        with run_on_commit():
+            self.post.save()
+        response = self.assertCached(self.index_url, cached=False)
+        self.assertContains(response, 'Новый текст')
+        self.assertCached(self.group_url, cached=False)
+        self.assertCached(self.group2_url)
+
+    def test_group_change_invalidates_its_feeds(self):
+        """Изменение группы сбрасывает ленты, где выводятся её посты."""
+        for url in (self.index_url, self.profile_url, self.group2_url):
+            self.guest_client.get(url)
+        self.group.slug = 'new-slug'
+        with run_on_commit():
+            self.group.save()
+        response = self.assertCached(self.index_url, cached=False)
+        self.assertContains(response, 'new-slug')
+        self.assertCached(self.profile_url, cached=False)
+        self.assertCached(self.group2_url)
+
+    def test_invalidated_after_commit(self):
+        """Версия ленты меняется только после фиксации транзакции."""
+        version = get_feed_version(INDEX_FEED)
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.user)
+            self.assertEqual(get_feed_version(INDEX_FEED), version)
+        self.assertNotEqual(get_feed_version(INDEX_FEED), version)
+
+
+class PostFeedReplicaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        Post.objects.create(text='Старый пост', author=cls.user)
+        cls.profile_url = reverse(
+            'posts:profile', kwargs={'username': cls.user}
+        )
+
+    def setUp(self):
+        caches['feeds'].clear()
+
+    def test_feeds_do_not_cache_stale_replica(self):
+        """Ленты с кэшем по версии не читают с отстающей реплики."""
+        with stale_replica() as replica:
+            with run_on_commit():
+                Post.objects.create(text='Новый пост', author=self.user)
+            self.assertFalse(
+                Post.objects.using(replica.alias).filter(
+                    text='Новый пост'
+                ).exists()
+            )
+            guest_client = Client()
+            for url in (reverse('posts:index'), self.profile_url,
+                        reverse('posts:index_syndication',
+                                kwargs={'feed_format': 'rss'}),
+                        reverse('api:posts')):
+                with self.subTest(url=url):
+                    for _ in range(2):
+                        response = guest_client.get(url)
+                        self.assertIn(
+                            'Новый пост', b''.join(response).decode()
+                        )
+            response = guest_client.get(self.profile_url)
+            self.assertContains(response, 'Всего постов: 2')
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.search_url = reverse('posts:search')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.python_post = Post.objects.create(
+            text='Питон питон питон и немного джанго', author=self.user
+        )
+        self.django_post = Post.objects.create(
+            text='Джанго и питон', author=self.user
+        )
+        self.other_post = Post.objects.create(
+            text='Совсем другой текст', author=self.user
+        )
+
+    def search(self, query, **params):
+        response = self.guest_client.get(
+            self.search_url, {'q': query, **params}
+        )
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_ranks_results(self):
+        """Поиск находит посты и ставит более релевантные выше."""
+        self.assertEqual(
+            self.search('питон'), [self.python_post.pk, self.django_post.pk]
+        )
+        self.assertEqual(self.search('джанго питон')[0], self.python_post.pk)
+        self.assertEqual(self.search('"кавычки" OR *'), [])
+
+    def test_search_index_follows_post_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.other_post.text = 'Теперь про питон'
+        self.other_post.save()
+        self.django_post.delete()
+        self.assertCountEqual(
+            self.search('питон'), [self.python_post.pk, self.other_post.pk]
+        )
+
+    def test_search_is_paginated(self):
+        """Результаты поиска делятся на страницы со ссылками на запрос."""
+        for i in range(12):
+            Post.objects.create(text=f'Питон № {i}', author=self.user)
+        self.assertEqual(len(self.search('питон')), 10)
+        self.assertEqual(len(self.search('питон', page=2)), 4)
+        response = self.guest_client.get(self.search_url, {'q': 'питон'})
+        self.assertContains(
+            response, '?q=%D0%BF%D0%B8%D1%82%D0%BE%D0%BD&amp;page=2'
+        )
+
+    def test_search_pages_in_sql(self):
+        """Страница поиска выбирает из индекса только свои id."""
+        for i in range(12):
+            Post.objects.create(text=f'Питон № {i}', author=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.search('питон', page=2)
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertIn('LIMIT 4 OFFSET 10', sql)
+
+    @override_settings(SEARCH_MAX_RESULTS=5)
+    def test_search_results_are_capped(self):
+        """Частое слово считается и листается не дальше границы."""
+        for i in range(12):
+            Post.objects.create(text=f'Питон № {i}', author=self.user)
+        response = self.guest_client.get(
+            self.search_url, {'q': 'питон', 'page': 2}
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 5)
+        self.assertEqual(page_obj.number, 1)
+        self.assertEqual(len(page_obj), 5)
+
+    def test_rebuild_search_index_command(self):
+        """Команда rebuild_search_index индексирует все посты."""
+        Post.objects.bulk_create(
+            [Post(text='Питон из пакета', author=self.user)]
+        )
+        self.assertEqual(len(self.search('пакета')), 0)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search('пакета')), 1)
+
+
+class PostConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.other = User.objects.create_user(username='Other_user')
+        cls.post = Post.objects.create(text='Текст', author=cls.user)
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.index_url = reverse('posts:index')
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_feed_not_modified(self):
+        """Повторный запрос ленты с ETag получает 304 без запросов к базе."""
+        response = self.guest_client.get(self.index_url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.index_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_modified_after_new_post(self):
+        """Новый пост меняет ETag ленты."""
+        etag = self.guest_client.get(self.index_url)['ETag']
+        with run_on_commit():
+            Post.objects.create(text='Новый пост', author=self.other)
+        response = self.guest_client.get(
+            self.index_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Новый пост')
+
+    def test_feed_etag_depends_on_user(self):
+        """Гость и пользователь видят разные страницы и разные ETag."""
+        guest_etag = self.guest_client.get(self.index_url)['ETag']
+        user_etag = self.authorized_client.get(self.index_url)['ETag']
+        self.assertNotEqual(guest_etag, user_etag)
+        response = self.authorized_client.get(
+            self.index_url, HTTP_IF_NONE_MATCH=guest_etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_last_modified_only_for_guests(self):
+        """После входа If-Modified-Since гостя не даёт 304."""
+        for url in (self.index_url, self.detail_url):
+            with self.subTest(url=url):
+                last_modified = self.guest_client.get(url)['Last-Modified']
+                response = self.authorized_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_post_detail_not_modified(self):
+        """Страница поста отдаёт 304, пока пост не изменился."""
+        response = self.guest_client.get(self.detail_url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        response = self.guest_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.guest_client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.post.text = 'Изменённый текст'
+        self.post.save()
+        response = self.guest_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertContains(response, 'Изменённый текст')
+
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(THUMBNAIL_ASYNC=False)
+class PostThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            text='Текст',
+            author=self.user,
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_placeholder_until_thumbnail_ready(self):
+        """Пока миниатюры нет, выводится заглушка, затем картинка."""
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'bg-light')
+        self.assertNotContains(response, '<img class="card-img')
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, '<img class="card-img')
+
+    def test_failed_thumbnail_not_retried(self):
+        """Ошибка миниатюры в логе; битый файл не разбирается каждый раз."""
+        post = Post.objects.create(
+            text='Битая картинка',
+            author=self.user,
+            image=SimpleUploadedFile(
+                'broken.gif', b'not an image', content_type='image/gif'
+            ),
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        with mock.patch.dict('posts.thumbnails._failed'), mock.patch(
+            'posts.thumbnails.generate_thumbnail', wraps=generate_thumbnail
+        ) as generate, self.assertLogs('posts.thumbnails') as logs, \
+                self.assertLogs('sorl.thumbnail'):
+            for _ in range(3):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'bg-light')
+        self.assertEqual(generate.call_count, 1)
+        self.assertIn(post.image.name, logs.output[0])
+
+    def test_warm_thumbnails_command(self):
+        """Команда warm_thumbnails создаёт миниатюры заранее."""
+        out = StringIO()
+        call_command('warm_thumbnails', '--workers=1', stdout=out)
+        self.assertIn('Готово миниатюр: 1', out.getvalue())
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, '<img class="card-img')
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .images import image_file
+
+POST_IMAGE_GEOMETRY = '960x339'
+POST_IMAGE_OPTIONS = {'crop': 'center', 'upscale': True}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+# Имя картинки → время неудачной попытки: битый файл не разбирается
+# заново на каждом просмотре поста.
+_failed = {}
+_lock = threading.Lock()
+
+
+class CachedThumbnailBackend(ThumbnailBackend):
+    """Умеет только искать готовую миниатюру, не создавая её."""
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        # Те же опции, что в ThumbnailBackend.get_thumbnail: от них
+        # зависит имя файла миниатюры.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = CachedThumbnailBackend()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+class ThumbnailError(Exception):
+    """Миниатюру создать не удалось."""
+
+
+def generate_thumbnail(name):
+    thumbnail = default.backend.get_thumbnail(
+        image_file(name), POST_IMAGE_GEOMETRY, **POST_IMAGE_OPTIONS
+    )
+    # Если картинку не прочитать, sorl пишет ошибку в свой лог и
+    # возвращает несозданный файл вместо исключения.
+    if not thumbnail.exists():
+        raise ThumbnailError(f'Миниатюра {name} не создана.')
+    return thumbnail
+
+
+def has_failed(name):
+    """Была ли неудачная попытка за THUMBNAIL_RETRY_SECONDS; под _lock."""
+    failed_at = _failed.get(name)
+    if failed_at is None:
+        return False
+    if time.monotonic() - failed_at < settings.THUMBNAIL_RETRY_SECONDS:
+        return True
+    del _failed[name]
+    return False
+
+
+def make_thumbnail(name):
+    """Создаёт миниатюру; при ошибке пишет её в лог и возвращает False.
+
+    Имя запоминается, чтобы schedule_thumbnail не повторял попытку.
+    """
+    try:
+        generate_thumbnail(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+        with _lock:
+            _failed[name] = time.monotonic()
+        return False
+    return True
+
+
+def _generate_in_background(name):
+    try:
+        make_thumbnail(name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        # У потока пула своё соединение с БД (kvstore sorl).
+        connection.close()
+
+
+def schedule_thumbnail(name):
+    """Ставит создание миниатюры в фоновый пул, если её ещё не делают.
+
+    После ошибки картинка не ставится в очередь снова, пока не пройдёт
+    THUMBNAIL_RETRY_SECONDS.
+    """
+    if not name:
+        return
+    with _lock:
+        if name in _pending or has_failed(name):
+            return
+        if settings.THUMBNAIL_ASYNC:
+            _pending.add(name)
+    if not settings.THUMBNAIL_ASYNC:
+        make_thumbnail(name)
+        return
+    get_executor().submit(_generate_in_background, name)
+
+
+def get_post_thumbnail(image):
+    """Готовая миниатюра картинки поста или None, пока она создаётся."""
+    if not image:
+        return None
+    thumbnail = backend.get_cached_thumbnail(
+        image, POST_IMAGE_GEOMETRY, **POST_IMAGE_OPTIONS
+    )
+    if thumbnail is None:
+        schedule_thumbnail(image.name)
+    return thumbnail
@@ -0,0 +1,123 @@
+from django.conf import settings
+
+from .models import Group, Post, TimelineEntry, User
+
+ORDERING = ('-pub_date', '-post_id')
+
+
+def card_fields(post):
+    """Поля карточки поста, которые выводит лента."""
+    author = post.author
+    return {
+        'pub_date': post.pub_date,
+        'text': post.text,
+        'author_id': post.author_id,
+        'author_username': author.username if author else '',
+        'author_first_name': author.first_name if author else '',
+        'author_last_name': author.last_name if author else '',
+        'group_id': post.group_id,
+        'group_slug': post.group.slug if post.group_id else '',
+    }
+
+
+def as_post(entry):
+    """Пост для шаблона ленты, собранный из карточки без запросов."""
+    post = Post(
+        id=entry.post_id,
+        text=entry.text,
+        pub_date=entry.pub_date,
+        author_id=entry.author_id,
+        group_id=entry.group_id,
+    )
+    if entry.author_id is not None:
+        post.author = User(
+            id=entry.author_id,
+            username=entry.author_username,
+            first_name=entry.author_first_name,
+            last_name=entry.author_last_name,
+        )
+    if entry.group_id is not None:
+        post.group = Group(id=entry.group_id, slug=entry.group_slug)
+    return post
+
+
+def add_post(post):
+    """Добавляет новый пост в ленту и обрезает её до TIMELINE_SIZE."""
+    TimelineEntry.objects.update_or_create(
+        post_id=post.pk, defaults=card_fields(post)
+    )
+    prune()
+
+
+def update_post(post):
+    # Дата публикации не меняется, поэтому место поста в ленте прежнее.
+    TimelineEntry.objects.filter(post_id=post.pk).update(**card_fields(post))
+
+
+def prune():
+    stale = TimelineEntry.objects.order_by(*ORDERING).values_list(
+        'pk', flat=True
+    )[settings.TIMELINE_SIZE:]
+    TimelineEntry.objects.filter(pk__in=list(stale)).delete()
+
+
+def top_up():
+    """Добирает ленту постами старше последней карточки после удаления."""
+    missing = settings.TIMELINE_SIZE - TimelineEntry.objects.count()
+    if missing <= 0:
+        return
+    posts = Post.objects.feed()
+    last = TimelineEntry.objects.order_by('pub_date', 'post_id').first()
+    if last is not None:
+        posts = posts.filter(pub_date__lte=last.pub_date).exclude(
+            pub_date=last.pub_date, pk__gte=last.pk
+        )
+    TimelineEntry.objects.bulk_create(
+        TimelineEntry(post_id=post.pk, **card_fields(post))
+        for post in posts[:missing]
+    )
+
+
+def reaches_timeline(pub_date):
+    """Попадёт ли в ленту главной пост с такой датой публикации."""
+    if TimelineEntry.objects.count() < settings.TIMELINE_SIZE:
+        return True
+    oldest = TimelineEntry.objects.order_by('pub_date').values_list(
+        'pub_date', flat=True
+    ).first()
+    return pub_date >= oldest
+
+
+def rebuild_timeline():
+    """Заново заполняет ленту новейшими постами; возвращает их число."""
+    TimelineEntry.objects.all().delete()
+    entries = TimelineEntry.objects.bulk_create(
+        TimelineEntry(post_id=post.pk, **card_fields(post))
+        for post in Post.objects.feed()[:settings.TIMELINE_SIZE]
+    )
+    return len(entries)
+
+
+def timeline_slice(start, stop):
+    """Посты ленты [start:stop] или None, если в ленте их нет целиком."""
+    if stop > settings.TIMELINE_SIZE:
+        return None
+    if stop <= start:
+        return []
+    entries = list(TimelineEntry.objects.order_by(*ORDERING)[start:stop])
+    if len(entries) != stop - start:
+        return None
+    return [as_post(entry) for entry in entries]
+
+
+def timeline_after(cursor, limit):
+    """limit постов после курсора (pub_date, id) или None."""
+    pub_date, pk = cursor
+    entries = list(
+        TimelineEntry.objects.filter(pub_date__lte=pub_date).exclude(
+            pub_date=pub_date, pk__gte=pk
+        ).order_by(*ORDERING)[:limit]
+    )
+    if len(entries) != limit:
+        return None
+    return [as_post(entry) for entry in entries]
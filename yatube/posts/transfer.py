@@ -0,0 +1,219 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.records import MAX_ERRORS, RecordError, batched, check_types
+
+from .bulk import explicit_pub_date, invalidate_feeds
+from .cache import GROUP_LIST, invalidate_pages
+from .counters import recount_counters
+from .models import Group, Post
+from .search import index_posts_after, is_search_available
+from .timeline import reaches_timeline, rebuild_timeline
+
+User = get_user_model()
+
+# Одна строка — одна запись группы или поста; лишние поля пустые.
+FIELDS = (
+    'type', 'slug', 'title', 'description',
+    'text', 'pub_date', 'author', 'group', 'image',
+)
+
+
+def export_records(batch_size):
+    """Группы, затем посты — словарями FIELDS, без загрузки всего в память."""
+    groups = Group.objects.order_by('pk').values(
+        'slug', 'title', 'description'
+    )
+    for group in groups.iterator(chunk_size=batch_size):
+        yield {'type': 'group', **group}
+    posts = Post.objects.order_by('pk').values_list(
+        'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    )
+    for text, pub_date, author, group, image in posts.iterator(
+        chunk_size=batch_size
+    ):
+        yield {
+            'type': 'post',
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group,
+            'image': image,
+        }
+
+
+class Importer:
+    """Импорт записей пакетами bulk_create.
+
+    Авторы и группы ищутся по словарям username → id и slug → id,
+    загруженным один раз, а не запросом на каждую запись.
+    """
+
+    def __init__(self, batch_size=1000, create_authors=False):
+        self.batch_size = batch_size
+        self.create_authors = create_authors
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.password = make_password(None)
+        self.created = {'groups': 0, 'posts': 0, 'authors': 0}
+        self.skipped = 0
+        # Храним только первые ошибки, чтобы память не росла с файлом.
+        self.errors = []
+        # bulk_create в SQLite не возвращает id: посты импорта — те, что
+        # новее last_post_id. Авторов и групп не больше, чем в базе.
+        self.last_post_id = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        self.author_ids = set()
+        self.group_ids = set()
+        self.latest_pub_date = None
+
+    def run(self, records):
+        # Прерванный импорт уже сохранил часть пакетов: счётчики, поиск и
+        # лента главной обновляются и в этом случае.
+        try:
+            for batch in batched(records, self.batch_size):
+                self.save_batch(batch)
+        finally:
+            self.refresh_derived_data()
+        return self.created
+
+    def refresh_derived_data(self):
+        """Обновляет то, что bulk_create обошёл мимо сигналов.
+
+        Пересчитываются только затронутые авторы и группы, в индекс
+        добавляются только новые посты, а лента главной перестраивается,
+        если новые посты попадают в неё по дате.
+        """
+        if self.created['groups']:
+            invalidate_pages({GROUP_LIST})
+        if not self.created['posts']:
+            return
+        recount_counters(
+            batch_size=self.batch_size,
+            author_ids=self.author_ids,
+            group_ids=self.group_ids,
+        )
+        if is_search_available():
+            index_posts_after(self.last_post_id)
+        if reaches_timeline(self.latest_pub_date):
+            rebuild_timeline()
+        invalidate_feeds(self.author_ids, self.group_ids)
+
+    def save_batch(self, batch):
+        groups, posts = [], []
+        for record in batch:
+            try:
+                check_types(record, FIELDS)
+                if record.get('type') == 'group':
+                    groups.append(self.build_group(record))
+                elif record.get('type') == 'post':
+                    posts.append(record)
+                else:
+                    raise RecordError('неизвестный тип записи')
+            except RecordError as error:
+                self.skip(record, error)
+        # Группы пакета сохраняются раньше постов, которые на них ссылаются.
+        self.save_groups(groups)
+        self.save_posts(posts)
+
+    def skip(self, record, error):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f'{record}: {error}')
+
+    def build_group(self, record):
+        slug = record.get('slug')
+        if not slug or not record.get('title'):
+            raise RecordError('у группы нет slug или title')
+        return Group(
+            slug=slug,
+            title=record['title'],
+            description=record.get('description') or '',
+        )
+
+    def save_groups(self, groups):
+        # Существующие группы не перезаписываются.
+        new = {}
+        for group in groups:
+            if group.slug not in self.groups:
+                new[group.slug] = group
+        if not new:
+            return
+        with transaction.atomic():
+            Group.objects.bulk_create(new.values())
+        self.groups.update(
+            Group.objects.filter(slug__in=new).values_list('slug', 'id')
+        )
+        self.created['groups'] += len(new)
+
+    def save_authors(self, usernames):
+        missing = {
+            name for name in usernames if name and name not in self.authors
+        }
+        if not missing or not self.create_authors:
+            return
+        with transaction.atomic():
+            User.objects.bulk_create(
+                User(username=name, password=self.password)
+                for name in missing
+            )
+        self.authors.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'id'
+            )
+        )
+        self.created['authors'] += len(missing)
+
+    def build_post(self, record):
+        if not record.get('text'):
+            raise RecordError('у поста нет текста')
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            raise RecordError('неизвестный автор')
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                raise RecordError('неизвестная группа')
+        pub_date = timezone.now()
+        if record.get('pub_date'):
+            try:
+                pub_date = parse_datetime(record['pub_date'])
+            except ValueError:
+                pub_date = None
+            if pub_date is None:
+                raise RecordError('неверная дата публикации')
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date, timezone.utc)
+        return Post(
+            text=record['text'],
+            pub_date=pub_date,
+            author_id=author_id,
+            group_id=group_id,
+            image=record.get('image') or '',
+        )
+
+    def save_posts(self, records):
+        self.save_authors(record.get('author') for record in records)
+        posts = []
+        for record in records:
+            try:
+                posts.append(self.build_post(record))
+            except RecordError as error:
+                self.skip(record, error)
+        if not posts:
+            return
+        with explicit_pub_date(), transaction.atomic():
+            Post.objects.bulk_create(posts)
+        self.created['posts'] += len(posts)
+        for post in posts:
+            self.author_ids.add(post.author_id)
+            if post.group_id is not None:
+                self.group_ids.add(post.group_id)
+        latest = max(post.pub_date for post in posts)
+        if self.latest_pub_date is None or latest > self.latest_pub_date:
+            self.latest_pub_date = latest
@@ -6,8 +6,24 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path(
+        'feed/<str:feed_format>/',
+        views.index_syndication,
+        name='index_syndication'
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/feed/<str:feed_format>/',
+        views.group_syndication,
+        name='group_syndication'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/<str:feed_format>/',
+        views.profile_syndication,
+        name='profile_syndication'
+    ),
+    path('search/', views.search, name='search'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -1,87 +1,231 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.http import urlencode
 
-from .forms import PostForm
+from core.routers import primary_reads
+
+from .cache import (INDEX_FEED, author_feed, get_cached_page,
+                    get_feed_version, group_feed, is_page_cacheable, page_key,
+                    set_cached_page)
+from .conditional import (feed_validators, not_modified, post_validators,
+                          set_validators)
+from .forms import PostForm, PostImageForm
 from .models import Group, Post, User
+from .paginators import FeedPaginator, SearchPaginator, TimelinePaginator
+from .search import search_post_ids
+from .syndication import FEED_FORMATS, syndication_response
+from .thumbnails import get_post_thumbnail
+from .uploadhandlers import streaming_image_uploads
+
 
+def get_page_obj(request, post_list, feed, paginator_class=FeedPaginator):
+    paginator = paginator_class(
+        post_list, settings.NUMBER_OF_POSTS, feed=feed
+    )
+    return paginator.get_page(
+        request.GET.get('page'),
+        after=request.GET.get('after'),
+    )
 
+
+def render_feed(request, template_name, context, post_list, feed,
+                paginator_class=FeedPaginator):
+    """Рендерит страницу ленты; для гостей отдаёт её из кэша.
+
+    Если у клиента актуальная копия, отвечает 304 ещё до выборки постов.
+    """
+    # Версия берётся до рендера, чтобы не закэшировать устаревшую
+    # страницу под новой версией.
+    version = get_feed_version(feed)
+    validators = feed_validators(request, feed, version)
+    response = not_modified(request, **validators)
+    if response is not None:
+        return response
+    key = None
+    if is_page_cacheable(request):
+        key = page_key(feed, version, request.get_full_path())
+        content = get_cached_page(key)
+        if content is not None:
+            return set_validators(HttpResponse(content), **validators)
+    context['page_obj'] = get_page_obj(
+        request, post_list, feed, paginator_class
+    )
+    response = render(request, template_name, context)
+    if key is not None:
+        set_cached_page(key, response.content)
+    return set_validators(response, **validators)
+
+
+@primary_reads()
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
-        'page_obj': page_obj,
-    }
-    return render(request, 'posts/index.html', context)
+    post_list = Post.objects.feed()
+    return render_feed(
+        request,
+        'posts/index.html',
+        {},
+        post_list,
+        INDEX_FEED,
+        TimelinePaginator
+    )
 
 
+@primary_reads()
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.feed()
     context = {
-        'page_obj': page_obj,
         'group': group,
     }
-    return render(
+    return render_feed(
         request,
         'posts/group_list.html',
-        context
+        context,
+        posts,
+        group_feed(group.pk)
     )
 
 
+@primary_reads()
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related('post_counter'),
+        username=username
+    )
+    posts = user.posts.feed()
     context = {
-        'page_obj': page_obj,
         'author': user,
     }
-    return render(request, 'posts/profile.html', context)
+    return render_feed(
+        request,
+        'posts/profile.html',
+        context,
+        posts,
+        author_feed(user.pk)
+    )
+
+
+def check_feed_format(feed_format):
+    if feed_format not in FEED_FORMATS:
+        raise Http404('Формат ленты не поддерживается.')
 
 
+@primary_reads()
+def index_syndication(request, feed_format):
+    check_feed_format(feed_format)
+    return syndication_response(
+        request,
+        INDEX_FEED,
+        feed_format,
+        Post.objects.all(),
+        title='Yatube: последние обновления',
+        link=reverse('posts:index'),
+        description='Новые посты на сайте.',
+    )
+
+
+@primary_reads()
+def group_syndication(request, slug, feed_format):
+    check_feed_format(feed_format)
+    group = get_object_or_404(Group, slug=slug)
+    return syndication_response(
+        request,
+        group_feed(group.pk),
+        feed_format,
+        group.posts.all(),
+        title=f'Yatube: {group.title}',
+        link=reverse('posts:group_list', kwargs={'slug': slug}),
+        description=group.description,
+    )
+
+
+@primary_reads()
+def profile_syndication(request, username, feed_format):
+    check_feed_format(feed_format)
+    author = get_object_or_404(User, username=username)
+    return syndication_response(
+        request,
+        author_feed(author.pk),
+        feed_format,
+        author.posts.all(),
+        title=f'Yatube: {author.get_full_name() or author.username}',
+        link=reverse('posts:profile', kwargs={'username': username}),
+        description=f'Посты автора {author.username}.',
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = SearchPaginator(
+        search_post_ids(query), settings.NUMBER_OF_POSTS
+    )
+    context = {
+        'page_obj': paginator.get_page(request.GET.get('page')),
+        'query': query,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@primary_reads()
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__post_counter', 'group'),
+        pk=post_id
+    )
+    thumbnail = get_post_thumbnail(post.image)
+    validators = post_validators(request, post, thumbnail is not None)
+    response = not_modified(request, **validators)
+    if response is not None:
+        return response
     context = {
         'post': post,
+        'thumbnail': thumbnail,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return set_validators(
+        render(request, 'posts/post_detail.html', context), **validators
+    )
 
 
+@streaming_image_uploads
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
-    if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+    post = Post(author=request.user)
+    form = PostForm(request.POST or None, instance=post)
+    image_form = PostImageForm(
+        request.POST or None,
+        files=request.FILES or None,
+        instance=post
+    )
+    if form.is_valid() and image_form.is_valid():
+        form.save()
         return redirect('posts:profile', username=request.user.username)
-    return render(request, 'posts/create_or_update.html', {'form': form})
+    return render(
+        request,
+        'posts/create_or_update.html',
+        {'form': form, 'image_form': image_form}
+    )
 
 
+@streaming_image_uploads
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
-    form = PostForm(
+    form = PostForm(request.POST or None, instance=post)
+    image_form = PostImageForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
-    if form.is_valid():
+    if form.is_valid() and image_form.is_valid():
         form.save()
         return redirect('posts:post_detail', post_id=post_id)
     return render(
         request,
         'posts/create_or_update.html',
-        {'post': post, 'form': form, 'is_edit': True}
+        {'post': post, 'form': form, 'image_form': image_form, 'is_edit': True}
     )
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.records import FORMATS, guess_format, read_records
+from users.transfer import FIELDS, UserImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает пользователей из JSON Lines или CSV с полями '
+        f'{", ".join(FIELDS)}; пароли хэшируются в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл для загрузки; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Размер пакета bulk_create.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Процессов для хэширования паролей; 1 — без пула.'
+        )
+        parser.add_argument(
+            '--validate', action='store_true',
+            help='Проверять пароли AUTH_PASSWORD_VALIDATORS.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError(
+                '--batch-size и --workers должны быть больше нуля.'
+            )
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        importer = UserImporter(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            validate=options['validate'],
+        )
+        started = time.perf_counter()
+        if path == '-':
+            created = importer.run(read_records(sys.stdin, file_format))
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                created = importer.run(read_records(stream, file_format))
+        elapsed = time.perf_counter() - started
+        for error in importer.errors:
+            self.stderr.write(error)
+        rows = created + importer.skipped
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей {created}; пропущено {importer.skipped}. '
+            f'{rows} строк за {elapsed:.1f} с '
+            f'({rows / max(elapsed, 1e-9):.0f} в секунду), '
+            f'процессов {options["workers"]}.'
+        ))
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+User = get_user_model()
+
+RECORDS = [
+    {'username': 'reader', 'email': 'Reader@EXAMPLE.com',
+     'first_name': 'Имя', 'password': 'pass-1'},
+    {'username': 'writer', 'password': 'pass-2'},
+    {'username': 'no_password'},
+    {'username': 'reader', 'password': 'again'},
+    {'username': 'existing', 'password': 'pass-3'},
+    {'username': 'bad name!', 'password': 'pass-4'},
+    {'email': 'nobody@example.com'},
+    {'username': ['list'], 'password': 'pass-5'},
+]
+
+
+class ImportUsersCommandTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(username='existing')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, records, name='users.jsonl'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            for record in records:
+                stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def import_users(self, path, **options):
+        stderr = StringIO()
+        call_command(
+            'import_users', path, stdout=StringIO(), stderr=stderr, **options
+        )
+        return stderr.getvalue()
+
+    def check_imported(self):
+        reader = User.objects.get(username='reader')
+        self.assertEqual(reader.email, 'Reader@example.com')
+        self.assertEqual(reader.first_name, 'Имя')
+        self.assertTrue(reader.check_password('pass-1'))
+        self.assertTrue(
+            User.objects.get(username='writer').check_password('pass-2')
+        )
+        self.assertFalse(
+            User.objects.get(username='no_password').has_usable_password()
+        )
+        self.assertFalse(
+            User.objects.get(username='existing').check_password('pass-3')
+        )
+        self.assertEqual(User.objects.count(), 4)
+
+    def test_import_in_process_pool(self):
+        """Пароли, хэшированные в процессах, проверяются как обычные."""
+        errors = self.import_users(
+            self.write(RECORDS), workers=2, batch_size=2
+        )
+        self.check_imported()
+        self.assertEqual(len(errors.splitlines()), 5)
+
+    def test_import_without_pool(self):
+        self.import_users(self.write(RECORDS), workers=1)
+        self.check_imported()
+
+    @override_settings(AUTH_PASSWORD_VALIDATORS=[{
+        'NAME': 'django.contrib.auth.password_validation.'
+                'MinimumLengthValidator',
+    }])
+    def test_validate_passwords(self):
+        self.import_users(self.write([
+            {'username': 'weak', 'password': '123'},
+            {'username': 'strong', 'password': 'long enough password'},
+        ]), validate=True)
+        self.assertEqual(
+            list(User.objects.filter(
+                username__in=['weak', 'strong']
+            ).values_list('username', flat=True)),
+            ['strong']
+        )
+
+    def test_bad_options(self):
+        with self.assertRaises(CommandError):
+            self.import_users(self.write(RECORDS), workers=0)
+
+
+class TestSettingsTest(TestCase):
+    def test_fast_password_hasher(self):
+        """Тестовые настройки хэшируют пароли быстрым MD5."""
+        self.assertEqual(get_hasher().algorithm, 'md5')
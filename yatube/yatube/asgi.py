@@ -0,0 +1,18 @@
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+os.environ.setdefault('YATUBE_ENV', 'prod')
+
+# Django 2.2 не умеет ASGI: view выполняются в пуле потоков ASGI_THREADS,
+# а цикл событий сервера (uvicorn, daphne) обслуживает соединения.
+application = WsgiToAsgi(get_wsgi_application(), settings.ASGI_THREADS)
+
+if settings.TEMPLATE_WARMUP:
+    from core.templating import warm_templates
+
+    warm_templates()
@@ -0,0 +1,15 @@
+"""Слой настроек выбирается переменной окружения YATUBE_ENV.
+
+dev (по умолчанию) — отладка, test — прогон тестов, prod — боевой режим.
+Слои можно указать и напрямую: DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+"""
+import os
+
+YATUBE_ENV = os.environ.get('YATUBE_ENV', 'dev')
+
+if YATUBE_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif YATUBE_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
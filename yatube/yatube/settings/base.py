@@ -0,0 +1,302 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+SECRET_KEY = 'bw!2zrgtrrdzzrccwq$qo=2venmmcjt5so3jip2=6h+9uvw0g+'
+
+DEBUG = False
+
+SERVE_MEDIA = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
+    'about',
+    'users.apps.UsersConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+
+
+def templates(cached):
+    """Настройки шаблонов; cached включает cached loader.
+
+    Слои настроек вызывают функцию заново, а не правят общий словарь.
+    """
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return [
+        {
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [TEMPLATES_DIR],
+            'OPTIONS': {
+                'loaders': loaders,
+                'context_processors': [
+                    'django.template.context_processors.debug',
+                    'django.template.context_processors.request',
+                    'django.contrib.auth.context_processors.auth',
+                    'django.contrib.messages.context_processors.messages',
+                    'core.context_processors.year.year',
+                ],
+            },
+        },
+    ]
+
+
+TEMPLATES = templates(cached=True)
+
+# Компилировать все шаблоны при старте WSGI-приложения.
+TEMPLATE_WARMUP = True
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+# Потоки, в которых yatube.asgi выполняет view; столько же соединений
+# с базой на процесс.
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
+
+
+# Соединение живёт между запросами, а не открывается на каждый.
+CONN_MAX_AGE = int(os.environ.get('YATUBE_CONN_MAX_AGE', 60))
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'OPTIONS': {
+            # Сколько секунд ждать снятия блокировки вместо
+            # «database is locked».
+            'timeout': 20,
+        },
+    }
+}
+
+# PRAGMA для каждого нового соединения с SQLite (core.signals).
+# WAL позволяет читать во время записи, NORMAL не ждёт fsync на каждый
+# коммит, mmap читает файл базы без лишних копий.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения; запись и чтение после записи — в default.
+DATABASE_REPLICAS = []
+
+# Для проверки на одной машине: YATUBE_SQLITE_REPLICAS=2 заводит копии
+# db.replica1.sqlite3, db.replica2.sqlite3, которые обновляет команда
+# sync_replicas.
+for _number in range(1, int(os.environ.get('YATUBE_SQLITE_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{_number}'] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'db.replica{_number}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_number}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_PIN_COOKIE = 'use_primary'
+
+# Сколько секунд после записи клиент читает с основной базы.
+REPLICA_PIN_SECONDS = 5
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+LOGIN_URL = 'users:login'
+
+LOGIN_REDIRECT_URL = 'posts:index'
+
+# LOGOUT_REDIRECT_URL = 'posts:index'
+
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+NUMBER_OF_POSTS = 10
+
+# Постов на странице JSON API по умолчанию и не больше чем ?limit=.
+API_PAGE_SIZE = 20
+
+API_MAX_PAGE_SIZE = 100
+
+# Постов в RSS и Atom лентах.
+SYNDICATION_ITEMS = 50
+
+# Сколько найденных постов можно пролистать в поиске: число совпадений
+# для частого слова считается не дальше этой границы.
+SEARCH_MAX_RESULTS = 1000
+
+# Сколько новейших постов держит готовая лента главной (TimelineEntry).
+TIMELINE_SIZE = 200
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feeds': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'feeds',
+    },
+}
+
+
+def file_cache(location, max_entries=300):
+    """Кэш в файлах: его видят все процессы на сервере."""
+    return {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': location,
+        'OPTIONS': {'MAX_ENTRIES': max_entries},
+    }
+
+
+# Версии лент (ETag, Last-Modified, ключи страниц) и счётчики должны быть
+# общими для всех воркеров, поэтому prod по умолчанию держит кэш лент в
+# файлах FEED_CACHE_DIR.
+FEED_CACHE_MAX_ENTRIES = 10000
+
+FEED_CACHE_DIR = os.environ.get('FEED_CACHE_DIR')
+
+if FEED_CACHE_DIR:
+    CACHES['feeds'] = file_cache(FEED_CACHE_DIR, FEED_CACHE_MAX_ENTRIES)
+
+FEED_CACHE_ALIAS = 'feeds'
+
+# Сессии читаются из кэша и пишутся в базу (core.sessions). Кэш в памяти
+# у каждого процесса свой, поэтому prod по умолчанию держит сессии в
+# файлах SESSION_CACHE_DIR: выход из аккаунта видят все воркеры.
+SESSION_CACHE_MAX_ENTRIES = 10000
+
+CACHES['sessions'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'sessions',
+    'OPTIONS': {'MAX_ENTRIES': SESSION_CACHE_MAX_ENTRIES},
+}
+
+SESSION_CACHE_DIR = os.environ.get('SESSION_CACHE_DIR')
+
+if SESSION_CACHE_DIR:
+    CACHES['sessions'] = file_cache(
+        SESSION_CACHE_DIR, SESSION_CACHE_MAX_ENTRIES
+    )
+
+SESSION_ENGINE = 'core.sessions'
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Истёкших сессий за одну транзакцию при очистке.
+SESSION_PURGE_BATCH_SIZE = 500
+
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+
+FEED_PAGE_CACHE_TIMEOUT = 60 * 5
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+
+POST_IMAGE_MAX_DIMENSIONS = (4096, 4096)
+
+# Сколько секунд после записи файл картинки нельзя удалить как лишний:
+# повторная загрузка того же файла ссылается на него до сохранения поста.
+POST_IMAGE_GRACE_SECONDS = 60 * 60
+
+THUMBNAIL_ASYNC = True
+
+THUMBNAIL_WORKERS = 2
+
+# Через сколько секунд снова пробовать миниатюру, создать которую не
+# удалось (битый или пропавший файл).
+THUMBNAIL_RETRY_SECONDS = 60 * 60
+
+# Доля запросов, которые замеряет PerformanceMiddleware; 0 — выключено.
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0))
+
+PERF_WINDOW = 1000
+
+PERF_FLUSH_INTERVAL = 60
+
+# Срок снимка процесса в кэше: снимки завершившихся процессов истекают.
+PERF_STATS_TIMEOUT = PERF_FLUSH_INTERVAL * 3
+
+# Кэш, через который процессы отдают статистику команде performance_stats.
+PERF_CACHE_ALIAS = FEED_CACHE_ALIAS
+
+# Проверка запросов к базе: '' — выключена, 'log' — в лог, 'raise' — ошибка.
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', '')
+
+# Сколько раз одна форма запроса может выполниться за запрос к странице.
+QUERY_BUDGET_MAX_REPEATS = 3
+
+QUERY_BUDGET_MAX_MS = 500
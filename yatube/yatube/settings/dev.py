@@ -0,0 +1,15 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import templates
+
+DEBUG = True
+
+# В отладке медиа отдаёт сам Django.
+SERVE_MEDIA = True
+
+# Правки шаблонов подхватываются без перезапуска; CACHED_TEMPLATES=1
+# включает кэш, чтобы замерять производительность как в prod.
+TEMPLATES = templates(cached=os.environ.get('CACHED_TEMPLATES') == '1')
+
+TEMPLATE_WARMUP = False
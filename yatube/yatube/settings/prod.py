@@ -0,0 +1,41 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import (BASE_DIR, CACHES, FEED_CACHE_MAX_ENTRIES, MIDDLEWARE,
+                   SECRET_KEY, SESSION_CACHE_MAX_ENTRIES, file_cache)
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY', SECRET_KEY)
+
+ALLOWED_HOSTS = os.environ.get(
+    'YATUBE_ALLOWED_HOSTS', 'localhost,127.0.0.1'
+).split(',')
+
+# GZip сжимает ответ, ConditionalGet отвечает 304 по ETag/Last-Modified.
+_after_security = MIDDLEWARE.index(
+    'django.middleware.security.SecurityMiddleware'
+) + 1
+
+MIDDLEWARE = [
+    *MIDDLEWARE[:_after_security],
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    *MIDDLEWARE[_after_security:],
+]
+
+# Воркеров несколько: кэш в памяти одного из них не узнал бы о выходе из
+# аккаунта или новом посте в другом и отдавал бы 304 по старой версии.
+FEED_CACHE_DIR = os.environ.get(
+    'FEED_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'feeds')
+)
+
+SESSION_CACHE_DIR = os.environ.get(
+    'SESSION_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'sessions')
+)
+
+CACHES = {
+    **CACHES,
+    'feeds': file_cache(FEED_CACHE_DIR, FEED_CACHE_MAX_ENTRIES),
+    'sessions': file_cache(SESSION_CACHE_DIR, SESSION_CACHE_MAX_ENTRIES),
+}
@@ -0,0 +1,22 @@
+import atexit
+import shutil
+import tempfile
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+TEMPLATE_WARMUP = False
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Картинки и миниатюры тестов пишутся во временный каталог, а не в media:
+# фоновый поток миниатюр может дописать файл и после конца теста.
+MEDIA_ROOT = tempfile.mkdtemp(prefix='yatube-media-')
+
+atexit.register(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+
+# PBKDF2 тратит на пароль около 0.1 с, а тестам стойкость хэша не нужна.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+AUTH_PASSWORD_VALIDATORS = []
@@ -3,19 +3,25 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import performance_stats
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path(
+        'admin/performance/', performance_stats, name='performance_stats'
+    ),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
 ]
 
 # handler404 = 'core.views.page_not_found'
 # handler500 = 'core.views.server_error'
 # handler403 = 'core.views.permission_denied'
 
-if settings.DEBUG:
+if settings.SERVE_MEDIA:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
     )
@@ -1,7 +1,15 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+# WSGI-сервер — это боевой запуск; runserver уже загрузил свой слой.
+os.environ.setdefault('YATUBE_ENV', 'prod')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATE_WARMUP:
+    from core.templating import warm_templates
+
+    warm_templates()